@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+# Concurrency is cut to this fraction of its value on throttling
+decrease_factor = 0.5
+
+# Latency above this multiple of the best latency seen counts as unhealthy
+latency_tolerance = 2.0
+
+# Weight of the newest sample in the smoothed latency
+latency_smoothing = 0.2
+
+# Share of failed (not throttled) calls among recent ones above which
+# concurrency stops growing
+max_error_rate = 0.05
+
+# Calls the error rate is computed over
+error_window = 100
+
+# Seconds of completions the throughput is computed over
+throughput_window = 30.0
+
+# Additive-increase / multiplicative-decrease limit on concurrent work. Every
+# completed call in a healthy period raises the limit by 1/limit, about one
+# slot per round of calls; a throttled response (429/503) halves it, at most
+# once per smoothed latency so one burst of throttling counts once, and a
+# Retry-After holds back new calls until it has passed. The limit stays
+# between floor and ceiling and starts at initial, or at the ceiling, so an
+# unthrottled run goes at full concurrency from the first call.
+class AdaptiveLimiter:
+    def __init__(self, floor=1, ceiling=32, initial=None):
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.limit = float(min(self.ceiling, max(self.floor, initial or self.ceiling)))
+        self.active = 0
+        self.throttled = 0
+        self.latency = None
+        self.best_latency = None
+        self.paused_until = 0.0
+        self._last_decrease = 0.0
+        self._outcomes = deque(maxlen=error_window)
+        self._completions = deque()
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self):
+        # Holds one unit of concurrency while the block runs. Outcomes
+        # (succeeded, failed, throttle) are reported from inside the block, so
+        # callers woken by its release see the adjusted limit.
+        while True:
+            pause = self.paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            async with self._condition:
+                if self.active < int(self.limit):
+                    self.active += 1
+                    break
+                await self._condition.wait()
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.active -= 1
+                self._condition.notify_all()
+
+    def record_latency(self, seconds):
+        self.latency = seconds if self.latency is None else \
+            latency_smoothing * seconds + (1 - latency_smoothing) * self.latency
+        self.best_latency = self.latency if self.best_latency is None else min(self.best_latency, self.latency)
+
+    def healthy(self):
+        if self._outcomes and self._outcomes.count(False) / len(self._outcomes) > max_error_rate:
+            return False
+        return self.latency is None or self.latency <= self.best_latency * latency_tolerance
+
+    def succeeded(self):
+        self._outcomes.append(True)
+        self._completions.append(time.monotonic())
+        if self.healthy():
+            self._set_limit(self.limit + 1 / self.limit)
+
+    def failed(self):
+        self._outcomes.append(False)
+
+    def throttle(self, retry_after=None):
+        now = time.monotonic()
+        self.throttled += 1
+        if retry_after:
+            self.paused_until = max(self.paused_until, now + retry_after)
+        if now - self._last_decrease >= (self.latency or 0):
+            self._last_decrease = now
+            self._set_limit(self.limit * decrease_factor)
+
+    def throughput(self):
+        # Completed calls per second over the last throughput_window seconds
+        now = time.monotonic()
+        while self._completions and self._completions[0] < now - throughput_window:
+            self._completions.popleft()
+        if not self._completions:
+            return 0.0
+        return len(self._completions) / max(now - self._completions[0], 1.0)
+
+    def stats(self):
+        return {'limit': int(self.limit), 'active': self.active, 'throughput': round(self.throughput(), 2),
+                'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+                'throttled': self.throttled}
+
+    def _set_limit(self, limit):
+        self.limit = min(float(self.ceiling), max(float(self.floor), limit))
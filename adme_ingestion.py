@@ -1,16 +1,56 @@
-from retry_decorator import async_retry
+from retry_decorator import async_retry, parse_retry_after
+from adaptive_limiter import AdaptiveLimiter
 from progress_tracker import ProgressTracker
 from logger import ingestion_logger, error_logger
 import aiohttp
 import asyncio
+import base64
 import json
+import time
+from urllib.parse import quote
+from azure.core.exceptions import ResourceNotFoundError
 from azure.storage.blob.aio import BlobServiceClient
+from generate_manifests import iter_manifests
+from manifest_batcher import iter_manifest_batches, is_batch_file
+
+# Bytes sent per Put Block request. Downloads are made in GETs of this size
+# too (ingest_to_adme), so an upload holds less than two blocks and peak
+# memory is about concurrency x 2 x block bytes whatever the file sizes are.
+upload_block_size = 8 * 1024 * 1024
+
+# Files waiting for a free worker, per worker. Once the queue is full the
+# manifest reader waits, so memory stays flat however many files there are.
+queue_depth_per_worker = 2
+
+# Each file's outcome is appended here as soon as it is known
+default_results_file = 'ingestion_results.ndjson'
+
+# ADME dataset service call handing out a signed upload URL per file
+storage_instructions_path = '/api/dataset/v1/storageInstructions?kindSubType=dataset--File.Generic'
+
+class ADMEAPIError(Exception):
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(f"ADME API error: {status} - {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+# Responses that mean ADME or storage is shedding load
+THROTTLE_STATUSES = (429, 503)
+
+def block_id(index):
+    # Block IDs of one blob must all have the same length
+    return base64.b64encode(f"{index:08d}".encode()).decode()
 
 class ADMEIngestionClient:
     def __init__(self, config):
         self.adme_endpoint = config['adme_endpoint']
         self.credentials = config['adme_credentials']
+        self.data_partition_id = config.get('data_partition_id')
         self.max_concurrent_uploads = config['max_concurrent_uploads']
+        self.limiter = AdaptiveLimiter(floor=config.get('min_concurrent_uploads', 1),
+                                       ceiling=config['max_concurrent_uploads'],
+                                       initial=config.get('initial_concurrent_uploads'))
+        self.block_size = config.get('upload_block_size', upload_block_size)
         self.session = None
 
     async def __aenter__(self):
@@ -20,54 +60,262 @@ class ADMEIngestionClient:
     async def __aexit__(self, exc_type, exc, tb):
         await self.session.close()
 
+    def headers(self):
+        headers = {"Authorization": f"Bearer {self.credentials['access_token']}"}
+        if self.data_partition_id:
+            headers['data-partition-id'] = self.data_partition_id
+        return headers
+
+    async def check_response(self, response, expected):
+        # Throttling is reported to the limiter before the error is raised
+        if response.status in expected:
+            return
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if response.status in THROTTLE_STATUSES:
+            self.limiter.throttle(retry_after)
+        raise ADMEAPIError(response.status, await response.text(), retry_after)
+
     @async_retry(max_attempts=3, delay=5)
-    async def upload_to_adme(self, file_content, manifest):
-        try:
-            # This is a placeholder. Replace with actual ADME API call
-            async with self.session.post(
-                f"{self.adme_endpoint}/ingest",
-                json={"manifest": manifest, "content": file_content.decode()},
-                headers={"Authorization": f"Bearer {self.credentials['access_token']}"}
-            ) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    error_msg = await response.text()
-                    raise Exception(f"ADME API error: {response.status} - {error_msg}")
-        except Exception as e:
-            error_logger.error(f"Error uploading to ADME: {str(e)}")
-            raise
+    async def storage_location(self):
+        # {"signedUrl", "fileSource", ...} for one file to upload
+        async with self.session.post(f"{self.adme_endpoint}{storage_instructions_path}", headers=self.headers()) as response:
+            await self.check_response(response, (200, 201))
+            return (await response.json())['storageLocation']
 
-async def ingest_to_adme(config, manifests_file):
-    with open(manifests_file, 'r') as f:
-        manifests = json.load(f)
+    @async_retry(max_attempts=5, delay=1)
+    async def put_block(self, signed_url, index, block):
+        url = f"{signed_url}&comp=block&blockid={quote(block_id(index), safe='')}"
+        async with self.session.put(url, data=block) as response:
+            await self.check_response(response, (201,))
+
+    @async_retry(max_attempts=5, delay=1)
+    async def put_block_list(self, signed_url, count, content_type=None):
+        body = '<?xml version="1.0" encoding="utf-8"?><BlockList>' + \
+               ''.join(f"<Latest>{block_id(i)}</Latest>" for i in range(count)) + '</BlockList>'
+        headers = {'x-ms-blob-content-type': content_type} if content_type else {}
+        async with self.session.put(f"{signed_url}&comp=blocklist", data=body.encode(), headers=headers) as response:
+            await self.check_response(response, (201,))
+
+    async def stream_blob(self, downloader, signed_url):
+        # Copy an opened blob download to the signed URL block by block; each
+        # block is retried on its own, so a transient failure costs one block.
+        # Returns the number of bytes sent.
+        content_type = getattr(getattr(downloader.properties, 'content_settings', None), 'content_type', None)
+        buffer = bytearray()
+        blocks = 0
+        sent = 0
+        async for chunk in downloader.chunks():
+            buffer += chunk
+            while len(buffer) >= self.block_size:
+                block = bytes(buffer[:self.block_size])
+                del buffer[:self.block_size]
+                await self.put_block(signed_url, blocks, block)
+                blocks += 1
+                sent += len(block)
+        if buffer:
+            await self.put_block(signed_url, blocks, bytes(buffer))
+            blocks += 1
+            sent += len(buffer)
+        await self.put_block_list(signed_url, blocks, content_type)
+        return sent
+
+    @async_retry(max_attempts=3, delay=5)
+    async def submit_manifest(self, manifest, file_source):
+        # This is a placeholder. Replace with actual ADME API call
+        async with self.session.post(
+            f"{self.adme_endpoint}/ingest",
+            json={"manifest": manifest, "fileSource": file_source},
+            headers=self.headers()
+        ) as response:
+            await self.check_response(response, (200,))
+            return await response.json()
+
+    async def upload_to_adme(self, blob_client, manifest):
+        # Stream the blob's content to a signed upload URL, then submit its
+        # manifest referencing the uploaded file. The content never has to
+        # fit in memory and is sent as is, so binary formats survive.
+        return await self.ingest_files([blob_client], manifest)
+
+    async def upload_batch_to_adme(self, blob_clients, manifest):
+        # Upload every file of a combined manifest ({file path: blob client}),
+        # then submit the manifest once with each file's fileSource keyed by path
+        return await self.ingest_files(list(blob_clients.values()), manifest, list(blob_clients))
+
+    async def ingest_files(self, blob_clients, manifest, paths=None):
+        # Runs within one slot of the adaptive limiter, so a combined manifest
+        # counts as one unit of concurrency however many files it carries
+        async with self.limiter.slot():
+            try:
+                file_sources = []
+                adme_seconds = 0.0
+                for blob_client in blob_clients:
+                    # Opening the download first means a missing blob fails
+                    # before anything is requested from ADME for it
+                    downloader = await blob_client.download_blob()
+                    # The time spent in ADME calls tells the limiter whether ADME is
+                    # keeping up; block transfers depend on file size and are not counted
+                    started = time.perf_counter()
+                    location = await self.storage_location()
+                    adme_seconds += time.perf_counter() - started
+                    await self.stream_blob(downloader, location['signedUrl'])
+                    file_sources.append(location['fileSource'])
+                started = time.perf_counter()
+                file_source = dict(zip(paths, file_sources)) if paths is not None else file_sources[0]
+                result = await self.submit_manifest(manifest, file_source)
+                # ADME time per file, so combined and single manifests compare
+                self.limiter.record_latency((adme_seconds + time.perf_counter() - started) / len(blob_clients))
+            except ResourceNotFoundError:
+                raise
+            except Exception as e:
+                # Throttling has already been reported to the limiter
+                if getattr(e, 'status', None) not in THROTTLE_STATUSES:
+                    self.limiter.failed()
+                error_logger.error(f"Error uploading to ADME: {str(e)}")
+                raise
+            self.limiter.succeeded()
+            return result
+
+async def iter_async(items):
+    # Blobs are addressed by the names the manifests give, read lazily, so the
+    # cost follows the manifests, not the size of the container
+    for item in items:
+        yield item
+
+async def run_worker_pool(items, handle, sink, workers, queue_size):
+    # A fixed set of workers pulls items from a bounded queue and hands each
+    # outcome to sink(item, outcome) as it finishes. The producer waits while
+    # the queue is full, so at most queue_size + workers items exist at once.
+    # An exception from handle or sink stops the pool: the producer stops
+    # reading items, the workers let the queued ones go unhandled, and the
+    # first exception is raised here once they have all finished.
+    queue = asyncio.Queue(maxsize=queue_size)
+    failures = []
+    stopped = asyncio.Event()
+    finished = object()
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is finished:
+                return
+            if stopped.is_set():
+                # Draining, so the producer never waits on a full queue
+                continue
+            try:
+                sink(item, await handle(item))
+            except Exception as e:
+                failures.append(e)
+                stopped.set()
+
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    try:
+        async for item in items:
+            if stopped.is_set():
+                break
+            await queue.put(item)
+        for _ in tasks:
+            await queue.put(finished)
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Cancelled workers are waited for, so their downloads are closed
+        # before the pool returns
+        await asyncio.gather(*tasks, return_exceptions=True)
+    if failures:
+        raise failures[0]
+
+async def ingest_from_container(config, container_client, manifests, total=None, batched=False):
+    # Ingest (name, manifest) pairs through a pool of max_concurrent_uploads
+    # workers, of which the adaptive limiter lets between
+    # min_concurrent_uploads and all upload at once. Outcomes stream to the results file as NDJSON lines
+    # {"FilePath", "status", "result" | "error"}; the counts per status are returned.
+    # With batched, manifests are (manifest ID, file paths, manifest) combined
+    # manifests instead: every file is uploaded, then the manifest is submitted
+    # once, and results lines carry "ManifestID" and "FilePaths". Counts are in files.
+    workers = config['max_concurrent_uploads']
+    queue_size = config.get('ingest_queue_size', workers * queue_depth_per_worker)
+    results_file = config.get('ingestion_results_file', default_results_file)
+    counts = {'ingested': 0, 'failed': 0, 'missing': 0}
 
     async with ADMEIngestionClient(config) as adme_client:
-        progress_tracker = ProgressTracker(len(manifests))
-        semaphore = asyncio.Semaphore(config['max_concurrent_uploads'])
+        progress_tracker = ProgressTracker(total, details=adme_client.limiter.stats)
 
-        async def process_file(blob, manifest):
+        async def process_file(item):
+            name, manifest = item
             try:
-                async with semaphore:
-                    file_content = await blob.download_blob().readall()
-                    result = await adme_client.upload_to_adme(file_content, manifest)
-                    ingestion_logger.info(f"Successfully ingested {blob.name}")
-                    progress_tracker.update(1)
-                    return result
+                # The download response carries the blob's properties; no
+                # separate properties call is made
+                blob_client = container_client.get_blob_client(name)
+                result = await adme_client.upload_to_adme(blob_client, manifest)
+                ingestion_logger.info(f"Successfully ingested {name}")
+                return 'ingested', result
+            except ResourceNotFoundError:
+                error_logger.error(f"Failed to ingest {name}: blob not found")
+                return 'missing', 'blob not found'
             except Exception as e:
-                error_logger.error(f"Failed to ingest {blob.name}: {str(e)}")
-                return None
+                error_logger.error(f"Failed to ingest {name}: {str(e)}")
+                return 'failed', str(e)
 
-        blob_service_client = BlobServiceClient.from_connection_string(config['connection_string'])
-        container_client = blob_service_client.get_container_client(config['container_name'])
+        async def process_batch(item):
+            manifest_id, paths, manifest = item
+            try:
+                blob_clients = {path: container_client.get_blob_client(path) for path in paths}
+                result = await adme_client.upload_batch_to_adme(blob_clients, manifest)
+                ingestion_logger.info(f"Successfully ingested {manifest_id} ({len(paths)} files)")
+                return 'ingested', result
+            except ResourceNotFoundError as e:
+                error_logger.error(f"Failed to ingest {manifest_id}: blob not found: {str(e)}")
+                return 'missing', f"blob not found: {str(e)}"
+            except Exception as e:
+                error_logger.error(f"Failed to ingest {manifest_id}: {str(e)}")
+                return 'failed', str(e)
 
-        tasks = []
-        async for blob in container_client.list_blobs():
-            if blob.name in manifests:
-                task = asyncio.create_task(process_file(blob, manifests[blob.name]))
-                tasks.append(task)
+        with open(results_file, 'w', encoding='utf-8') as results:
+            def sink(item, outcome):
+                status, detail = outcome
+                if batched:
+                    files = len(item[1])
+                    record = {'ManifestID': item[0], 'FilePaths': item[1], 'status': status}
+                else:
+                    files = 1
+                    record = {'FilePath': item[0], 'status': status}
+                counts[status] += files
+                record['result' if status == 'ingested' else 'error'] = detail
+                results.write(json.dumps(record, default=str) + '\n')
+                progress_tracker.update(files, failed=status != 'ingested')
 
-        results = await asyncio.gather(*tasks)
+            await run_worker_pool(iter_async(manifests), process_batch if batched else process_file,
+                                  sink, workers, queue_size)
         progress_tracker.complete()
 
-        return results
+    concurrency = adme_client.limiter.stats()
+    print(f"{counts['ingested']} files ingested, {counts['failed']} failed, {counts['missing']} missing; "
+          f"results written to {results_file}")
+    print(f"Upload concurrency ended at {concurrency['limit']} (floor {adme_client.limiter.floor}, "
+          f"ceiling {adme_client.limiter.ceiling}), {concurrency['throughput']} files/s, "
+          f"{concurrency['throttled']} throttled responses")
+    return dict(counts, results_file=results_file, concurrency=concurrency)
+
+def count_manifests(manifests_file, batched=False):
+    # Files to ingest: one per line, or the FilePaths of each combined manifest
+    if not manifests_file.lower().endswith(('.ndjson', '.jsonl')):
+        return None
+    if batched:
+        return sum(len(paths) for _, paths, _ in iter_manifest_batches(manifests_file))
+    with open(manifests_file, 'rb') as f:
+        return sum(1 for line in f if line.strip())
+
+async def ingest_to_adme(config, manifests_file):
+    # Manifests are streamed from the file rather than loaded whole. A file of
+    # combined manifests (manifest_batcher.py) is recognised by its first line.
+    batched = is_batch_file(manifests_file)
+    manifests = iter_manifest_batches(manifests_file) if batched else iter_manifests(manifests_file)
+    # The SDK's first GET of a download is max_single_get_size (32 MB by
+    # default); capping both GET sizes at the block size bounds each transfer
+    block_size = config.get('upload_block_size', upload_block_size)
+    async with BlobServiceClient.from_connection_string(config['connection_string'], max_single_get_size=block_size,
+                                                        max_chunk_get_size=block_size) as blob_service_client:
+        container_client = blob_service_client.get_container_client(config['container_name'])
+        return await ingest_from_container(config, container_client, manifests,
+                                           total=count_manifests(manifests_file, batched), batched=batched)
@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+from fake_blob_service import FakeBlobStore, AsyncFakeBlobServiceClient
+from query_blob_storage import write_inventory, max_concurrent_listings
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def report(stage, count, elapsed, peak, worker_peak):
+    result = {
+        'stage': stage,
+        'blobs': count,
+        'seconds': elapsed,
+        'blobs_per_sec': count / elapsed if elapsed else 0.0,
+        'peak_rss_mb': peak,
+        'peak_worker_rss_mb': worker_peak,
+    }
+    print(f"{stage:<15} {count:>10,} blobs {elapsed:9.2f}s {result['blobs_per_sec']:>12,.0f} blobs/s "
+          f"peak RSS {result['peak_rss_mb']:,.0f} MB (workers {result['peak_worker_rss_mb']:,.0f} MB)")
+    return result
+
+def run_stage(stage, *args):
+    # ru_maxrss is a high-water mark for the whole process, so each stage runs
+    # in a freshly spawned interpreter and reports that interpreter's peak
+    import multiprocessing
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(stage, args)
+
+async def bench_inventory(store, container_name, output_file, concurrency):
+    async with AsyncFakeBlobServiceClient(store) as blob_service_client:
+        container_client = blob_service_client.get_container_client(container_name)
+        return await write_inventory(container_client, container_name, output_file, max_concurrency=concurrency)
+
+def stage_inventory(blobs, latency, container_name, output_file, concurrency):
+    # The fake container's name list is built here, so it counts towards the
+    # stage's peak
+    start = time.perf_counter()
+    store = FakeBlobStore(latency=latency).add_synthetic(container_name, blobs)
+    print(f"Generated {blobs:,} synthetic blobs in {time.perf_counter() - start:.2f}s (latency {latency * 1000:.0f} ms per call)")
+    start = time.perf_counter()
+    count = asyncio.run(bench_inventory(store, container_name, output_file, concurrency))
+    elapsed = time.perf_counter() - start
+    print(f"  {store.calls:,} service calls")
+    return count, elapsed, peak_rss_mb(), peak_rss_mb(resource.RUSAGE_CHILDREN)
+
+def stage_classification(inventory_file, output_file, table_file):
+    from json_to_csv import write_enhanced_inventory
+    start = time.perf_counter()
+    count = write_enhanced_inventory(inventory_file, output_file, table_file)
+    return count, time.perf_counter() - start, peak_rss_mb(), peak_rss_mb(resource.RUSAGE_CHILDREN)
+
+def run_benchmark(blobs=100000, latency=0.0, concurrency=max_concurrent_listings, stages=('inventory', 'classification'), work_dir=None):
+    # Inventory a synthetic container with the fake blob service, then classify
+    # the resulting inventory, reporting throughput and peak RSS for each stage.
+    # Each timed stage runs in its own process, so its peak RSS is its own.
+    container_name = "benchmark"
+    work_dir = work_dir or tempfile.mkdtemp(prefix='ingest-wiz-bench-')
+    inventory_file = os.path.join(work_dir, 'blob_inventory.ndjson')
+    results = []
+
+    if 'inventory' in stages or not os.path.exists(inventory_file):
+        count, elapsed, peak, worker_peak = run_stage(stage_inventory, blobs, latency, container_name, inventory_file, concurrency)
+        results.append(report('inventory', count, elapsed, peak, worker_peak))
+
+    if 'classification' in stages:
+        count, elapsed, peak, worker_peak = run_stage(stage_classification, inventory_file,
+                                                      os.path.join(work_dir, 'blob_inventory_enhanced.csv'),
+                                                      os.path.join(work_dir, 'blob_inventory_enhanced.parquet'))
+        results.append(report('classification', count, elapsed, peak, worker_peak))
+
+    print(f"Benchmark outputs are in {work_dir}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the inventory and classification stages against a fake blob service")
+    parser.add_argument('--blobs', type=int, default=100000, help='Number of synthetic blobs (default: %(default)s)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Simulated latency per service call')
+    parser.add_argument('--concurrency', type=int, default=max_concurrent_listings, help='Concurrent listings')
+    parser.add_argument('--stages', default='inventory,classification', help='Comma separated stages to run (inventory, classification)')
+    parser.add_argument('--work-dir', default=None, help='Directory for the benchmark outputs')
+    args = parser.parse_args()
+    run_benchmark(args.blobs, args.latency_ms / 1000, args.concurrency, args.stages.split(','), args.work_dir)
+
+if __name__ == "__main__":
+    main()
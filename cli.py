@@ -1,12 +1,14 @@
 import click
 import json
-import pandas as pd
-import asyncio
-from query_blob_storage import inventory_blobs
-from json_to_csv import process_inventory, generate_summary, visualize_dataset
-from manifest_coverage_assessment import generate_coverage_report
-from generate_manifests import generate_all_manifests
-from adme_ingestion import ingest_to_adme
+import os
+import subprocess
+import sys
+import time
+
+# Commands import what they need when they run, so `cli.py --help` and
+# argument errors stay fast. startup-check fails when `cli.py --help` takes
+# longer than this, measured from interpreter start.
+startup_budget_ms = 250
 
 @click.group()
 def cli():
@@ -18,42 +20,70 @@ def cli():
 @click.option('--container-name', required=True, help='Azure Storage container name')
 def inventory(connection_string, container_name):
     """Take inventory of files in Azure Blob Storage"""
+    import asyncio
+    from query_blob_storage import inventory_blobs
     asyncio.run(inventory_blobs(connection_string, container_name))
-    click.echo("Inventory completed. Output saved to blob_inventory.json")
+    click.echo("Inventory completed. Output saved to blob_inventory.ndjson")
 
 @cli.command()
-@click.option('--input-file', default='blob_inventory.json', help='Input JSON file')
-@click.option('--output-file', default='categorized_inventory.csv', help='Output CSV file')
-def process(input_file, output_file):
-    """Process inventory and generate CSV"""
-    df = process_inventory(input_file)
-    df.to_csv(output_file, index=False)
-    generate_summary(df)
-    visualize_dataset(df)
+@click.option('--input-file', default='blob_inventory.ndjson', help='Input inventory file (NDJSON or JSON)')
+@click.option('--output-file', default='categorized_inventory.parquet', help='Output inventory table (.parquet or .csv)')
+@click.option('--skip-visualizations', is_flag=True, help='Do not render the summary charts')
+def process(input_file, output_file, skip_visualizations):
+    """Process inventory and generate the categorized inventory table"""
+    from json_to_csv import process_inventory, generate_summary
+    from inventory_store import write_inventory_table
+    from visualizations import BackgroundRenderer, render_inventory_charts
+    with BackgroundRenderer(enabled=not skip_visualizations) as renderer:
+        df = process_inventory(input_file)
+        kinds_summary = generate_summary(df)
+        renderer.submit(render_inventory_charts, kinds_summary)
+        write_inventory_table(df, output_file)
     click.echo(f"Processing completed. Output saved to {output_file}")
 
 @cli.command()
-@click.option('--input-file', default='categorized_inventory.csv', help='Input CSV file')
+@click.option('--input-file', default='categorized_inventory.parquet', help='Input inventory table (.parquet or .csv)')
 @click.option('--schemas-file', required=True, help='OSDU schemas file')
-def assess_coverage(input_file, schemas_file):
+@click.option('--output-file', default='manifest_coverage_report.txt', help='Coverage report file')
+def assess_coverage(input_file, schemas_file, output_file):
     """Assess manifest coverage"""
-    df = pd.read_csv(input_file)
-    with open(schemas_file, 'r') as f:
-        schemas = json.load(f)
-    generate_coverage_report(df, schemas)
-    click.echo("Coverage assessment completed. Report saved to manifest_coverage_report.txt")
+    from manifest_coverage_assessment import generate_coverage_report
+    generate_coverage_report(input_file, schemas_file, output_file=output_file)
+    click.echo(f"Coverage assessment completed. Report saved to {output_file}")
 
 @cli.command()
-@click.option('--input-file', default='categorized_inventory.csv', help='Input CSV file')
-@click.option('--output-file', default='generated_manifests.json', help='Output JSON file')
-def generate_manifests(input_file, output_file):
+@click.option('--input-file', default='categorized_inventory.parquet', help='Input inventory table (.parquet or .csv)')
+@click.option('--output-file', default='generated_manifests.ndjson', help='Output NDJSON file, one manifest per line')
+@click.option('--batch', is_flag=True, help='Pack files of one well, survey or folder into combined manifests')
+@click.option('--map-file', default='manifest_file_map.csv', help='FilePath to ManifestID mapping written with --batch')
+@click.option('--max-bytes', default=1024 * 1024, help='Maximum size of a combined manifest')
+@click.option('--max-records', default=500, help='Maximum files carried by a combined manifest')
+def generate_manifests(input_file, output_file, batch, map_file, max_bytes, max_records):
     """Generate OSDU manifests"""
+    if batch:
+        from manifest_batcher import batch_manifests
+        batch_manifests(input_file, output_file, map_file, max_bytes, max_records)
+        click.echo(f"Combined manifests saved to {output_file}, file map saved to {map_file}")
+        return
+    from generate_manifests import generate_all_manifests
     generate_all_manifests(input_file, output_file)
     click.echo(f"Manifests generated and saved to {output_file}")
 
+@cli.command()
+@click.option('--input-file', default='generated_manifests.ndjson', help='Manifest NDJSON file')
+@click.option('--output-file', default=None, help='Where valid manifests go (default: replace the input)')
+@click.option('--quarantine-file', default='quarantined_manifests.ndjson', help='Where invalid manifests go')
+@click.option('--require-schema', is_flag=True, help='Quarantine manifests whose kind has no schema')
+def validate_manifests(input_file, output_file, quarantine_file, require_schema):
+    """Validate manifests against their kind's schema before ingestion"""
+    from manifest_validation import validate_manifests as validate, quarantined
+    report = validate(input_file, output_file, quarantine_file, require_schema)
+    invalid, unchecked = quarantined(report, require_schema)
+    click.echo(f"Validation completed. {invalid + unchecked} manifests quarantined to {quarantine_file}")
+
 @cli.command()
 @click.option('--config', default='config.json', help='Configuration file')
-@click.option('--manifests-file', default='generated_manifests.json', help='Manifests JSON file')
+@click.option('--manifests-file', default='generated_manifests.ndjson', help='Manifests file (NDJSON, or a JSON object keyed by file path)')
 @click.option('--dry-run', is_flag=True, help='Perform a dry run without actual ingestion')
 def ingest(config, manifests_file, dry_run):
     """Ingest data into ADME"""
@@ -62,8 +92,52 @@ def ingest(config, manifests_file, dry_run):
     if dry_run:
         click.echo("Performing dry run...")
     else:
+        import asyncio
+        from adme_ingestion import ingest_to_adme
         asyncio.run(ingest_to_adme(config_data, manifests_file))
     click.echo("Ingestion process completed")
 
+@cli.command()
+@click.option('--blobs', default=100000, help='Number of synthetic blobs')
+@click.option('--latency-ms', default=0.0, help='Simulated latency per storage call')
+@click.option('--concurrency', default=16, help='Concurrent listings')
+@click.option('--stages', default='inventory,classification', help='Comma separated stages to run')
+def benchmark(blobs, latency_ms, concurrency, stages):
+    """Benchmark inventory and classification against a fake blob service"""
+    from benchmark import run_benchmark
+    run_benchmark(blobs, latency_ms / 1000, concurrency, stages.split(','))
+
+@cli.command()
+@click.option('--runs', default=5, help='Number of timed runs')
+@click.option('--budget-ms', default=startup_budget_ms, help='Maximum allowed median startup time')
+@click.option('--imports', is_flag=True, help='Also list the slowest imports (python -X importtime)')
+def startup_check(runs, budget_ms, imports):
+    """Time `cli.py --help` in fresh interpreters against the startup budget"""
+    command = [sys.executable, os.path.abspath(__file__), '--help']
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    median = timings[len(timings) // 2]
+    click.echo(f"Startup over {runs} runs: median {median:.0f} ms, min {timings[0]:.0f} ms, "
+               f"max {timings[-1]:.0f} ms (budget {budget_ms} ms)")
+
+    if imports:
+        result = subprocess.run([sys.executable, '-X', 'importtime'] + command[1:],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        # importtime lines: "import time: self [us] | cumulative | imported package"
+        rows = []
+        for line in result.stderr.splitlines()[1:]:
+            parts = line.split('|')
+            if len(parts) == 3:
+                rows.append((int(parts[1]), parts[2].rstrip()))
+        for cumulative, module in sorted(rows, reverse=True)[:15]:
+            click.echo(f"  {cumulative / 1000:8.1f} ms {module}")
+
+    if median > budget_ms:
+        raise click.ClickException(f"Startup time {median:.0f} ms is over the {budget_ms} ms budget")
+
 if __name__ == '__main__':
     cli()
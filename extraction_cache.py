@@ -0,0 +1,132 @@
+import json
+import os
+import sqlite3
+import time
+
+data_dir = 'data'
+default_cache_file = os.path.join(data_dir, 'extraction_cache.sqlite')
+
+# Entries are evicted least-recently-used first once they exceed this
+max_cache_bytes = 256 * 1024 * 1024
+
+# Bytes an entry costs beyond its payload and key text: the SQLite row and
+# record headers, the size and last_access columns and the index entries
+entry_overhead = 100
+
+# Writes are committed in batches of this many puts
+commit_every = 200
+
+def entry_size(container, name, kind, etag, text):
+    # What an entry costs on disk, as counted against max_cache_bytes. The key
+    # is stored in the row and again in the primary key index.
+    key = len(container.encode()) + len(name.encode()) + len(kind)
+    return len(text.encode()) + 2 * key + len(etag.encode()) + entry_overhead
+
+# Persistent cache of extraction results keyed by (container, blob name, etag,
+# kind). A blob whose etag has not changed is served from here instead of
+# being downloaded and parsed again; a new etag replaces the old entry.
+class ExtractionCache:
+    def __init__(self, path=default_cache_file, max_bytes=max_cache_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pending = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                container TEXT NOT NULL,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                etag TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (container, name, kind)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def get(self, container, name, etag, kinds=('las',)):
+        # kinds are tried in order, so a full parse can also answer a header-only lookup
+        if etag:
+            for kind in kinds:
+                row = self.conn.execute(
+                    "SELECT payload FROM entries WHERE container = ? AND name = ? AND kind = ? AND etag = ?",
+                    (container, name, kind, etag)).fetchone()
+                if row is None:
+                    continue
+                payload = json.loads(row[0])
+                if not self._files_exist(payload):
+                    continue
+                self.conn.execute("UPDATE entries SET last_access = ? WHERE container = ? AND name = ? AND kind = ?",
+                                  (time.time(), container, name, kind))
+                self._count_write()
+                self.hits += 1
+                return payload
+        self.misses += 1
+        return None
+
+    def put(self, container, name, etag, payload, kind='las'):
+        if not etag:
+            return
+        text = json.dumps(payload, default=str)
+        previous = self.conn.execute("SELECT size FROM entries WHERE container = ? AND name = ? AND kind = ?",
+                                     (container, name, kind)).fetchone()
+        if previous:
+            self.total_bytes -= previous[0]
+        size = entry_size(container, name, kind, etag, text)
+        self.conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                          (container, name, kind, etag, text, size, time.time()))
+        self.total_bytes += size
+        self._evict()
+        self._count_write()
+
+    def stats(self):
+        entries = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': entries, 'bytes': self.total_bytes}
+
+    def _files_exist(self, payload):
+        # A cached parse is only usable while the curve files it points at exist
+        store = payload.get('curve_store') if isinstance(payload, dict) else None
+        if not store:
+            return True
+        return all(os.path.exists(store[key]) for key in ('path', 'text_path') if store.get(key))
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            oldest = self.conn.execute(
+                "SELECT rowid, size FROM entries ORDER BY last_access LIMIT 100").fetchall()
+            if not oldest:
+                break
+            for rowid, size in oldest:
+                self.conn.execute("DELETE FROM entries WHERE rowid = ?", (rowid,))
+                self.total_bytes -= size
+                self.evictions += 1
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def _count_write(self):
+        self._pending += 1
+        if self._pending >= commit_every:
+            self.conn.commit()
+            self._pending = 0
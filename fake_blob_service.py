@@ -0,0 +1,482 @@
+import asyncio
+import bisect
+import datetime
+import time
+import zlib
+from types import SimpleNamespace
+
+# In-process stand-in for Azure Blob Storage. It implements the parts of the
+# azure.storage.blob (sync) and azure.storage.blob.aio clients this repo uses:
+# paged list_blobs, walk_blobs with a delimiter, get_blob_properties and
+# download_blob with offset/length range reads. Containers can be filled with
+# millions of synthetic blobs and every service call can be given a latency.
+
+# Synthetic Volve-like layout: folder -> extensions of the files it holds
+SYNTHETIC_LAYOUT = [
+    ("Well_logs", [".las", ".dlis", ".pdf"]),
+    ("Seismic", [".segy", ".sgy", ".p1", ".p6"]),
+    ("Production_data", [".csv", ".xlsx", ".json"]),
+    ("Reservoir_model", [".grdecl", ".rms", ".resqml"]),
+    ("WITSML_realtime_drilling_data", [".xml", ".witsml"]),
+    ("Well_technical_data", [".pdf", ".docx", ".txt"]),
+    ("Geophysical_Interpretations", [".resqml", ".dat"]),
+]
+
+CONTENT_TYPES = {
+    ".csv": "text/csv",
+    ".json": "application/json",
+    ".pdf": "application/pdf",
+    ".xml": "application/xml",
+    ".las": "text/plain",
+}
+
+# Synthetic LAS files get this many depth samples
+las_samples = 2000
+
+BASE_TIME = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+_EMPTY = SimpleNamespace(
+    duration=None, state=None, status=None, expiry_time=None, policy_mode=None,
+    id=None, source=None, progress=None, completion_time=None, status_description=None,
+)
+_content_settings = {}
+
+def content_settings_for(name):
+    extension = name[name.rfind('.'):].lower() if '.' in name else ''
+    content_type = CONTENT_TYPES.get(extension, "application/octet-stream")
+    settings = _content_settings.get(content_type)
+    if settings is None:
+        settings = SimpleNamespace(content_type=content_type, content_encoding=None, content_language=None,
+                                   content_disposition=None, cache_control=None, content_md5=None)
+        _content_settings[content_type] = settings
+    return settings
+
+class FakeBlobProperties:
+    # Mirrors the BlobProperties attributes read by query_blob_storage.BLOB_FIELDS.
+    # Only the per-blob values live on the instance; everything else is a class default.
+    __slots__ = ('name', 'size', 'etag', 'last_modified', 'creation_time', 'content_settings')
+
+    container = None
+    blob_type = "BlockBlob"
+    blob_tier = "Hot"
+    blob_tier_change_time = None
+    blob_tier_inferred = True
+    metadata = {}
+    tags = None
+    tag_count = None
+    version_id = None
+    is_current_version = None
+    snapshot = None
+    deleted = False
+    deleted_time = None
+    remaining_retention_days = None
+    last_accessed_on = None
+    server_encrypted = True
+    encryption_scope = None
+    encryption_key_sha256 = None
+    request_server_encrypted = None
+    has_legal_hold = None
+    has_versions_only = None
+    immutability_policy = _EMPTY
+    lease = _EMPTY
+    copy = _EMPTY
+    append_blob_committed_block_count = None
+    page_blob_sequence_number = None
+    rehydrate_priority = None
+    content_range = None
+
+    def __init__(self, name, size, etag, last_modified, content_settings):
+        self.name = name
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.creation_time = last_modified
+        self.content_settings = content_settings
+
+class FakeBlobPrefix:
+    __slots__ = ('name', 'prefix')
+
+    def __init__(self, name):
+        self.name = name
+        self.prefix = name
+
+class FakeResourceNotFoundError(Exception):
+    pass
+
+def resource_not_found(message):
+    # Raise the SDK's own exception when it is installed so callers can catch it as usual
+    try:
+        from azure.core.exceptions import ResourceNotFoundError
+        return ResourceNotFoundError(message)
+    except ImportError:
+        return FakeResourceNotFoundError(message)
+
+def synthetic_las_header(name, samples):
+    well = name.rsplit('/', 1)[-1].rsplit('.', 1)[0]
+    lines = [
+        "~Version Information",
+        " VERS.                  2.0 : CWLS LOG ASCII STANDARD - VERSION 2.0",
+        " WRAP.                   NO : ONE LINE PER DEPTH STEP",
+        "~Well Information",
+        " STRT.M              1000.0 : START DEPTH",
+        f" STOP.M              {1000.0 + (samples - 1) * 0.5:.1f} : STOP DEPTH",
+        " STEP.M                 0.5 : STEP",
+        " NULL.              -999.25 : NULL VALUE",
+        " COMP.            EQUINOR   : COMPANY",
+        f" WELL.            {well} : WELL",
+        " FLD .            VOLVE     : FIELD",
+        " CTRY.            NORWAY    : COUNTRY",
+        "~Curve Information",
+        " DEPT.M                     : DEPTH",
+        " GR  .API                   : GAMMA RAY",
+        " RHOB.G/C3                  : BULK DENSITY",
+        " NPHI.V/V                   : NEUTRON POROSITY",
+        "~ASCII",
+    ]
+    return "\n".join(lines) + "\n"
+
+# Data lines are fixed width so a LAS blob's size is known without building it
+LAS_LINE_WIDTH = 39
+
+def synthetic_las_size(name, samples=None):
+    samples = samples or las_samples
+    return len(synthetic_las_header(name, samples).encode('ascii')) + samples * LAS_LINE_WIDTH
+
+def synthetic_las(name, samples=None):
+    samples = samples or las_samples
+    lines = [synthetic_las_header(name, samples)]
+    seed = zlib.crc32(name.encode())
+    for i in range(samples):
+        value = (seed + i * 7919) % 1000
+        lines.append(f"{1000.0 + i * 0.5:10.1f}{value / 10:9.2f}{2.0 + value / 2000:9.4f}{value / 4000:10.4f}\n")
+    return "".join(lines).encode('ascii')
+
+class FakeBlobStore:
+    # Holds one or more containers as sorted name lists. Synthetic blobs derive
+    # their size, etag and content from their name, so nothing per blob is kept
+    # except the name itself; uploaded blobs keep their bytes.
+    def __init__(self, latency=0.0, page_size=5000):
+        self.latency = latency
+        self.page_size = page_size
+        self.containers = {}
+        self.uploaded = {}
+        self.max_size = 1024 * 1024
+        self.calls = 0
+
+    def create_container(self, container, names=()):
+        self.containers[container] = sorted(names)
+        return self
+
+    def add_synthetic(self, container, count, root="files/Volve/", files_per_folder=2000, max_size=64 * 1024 * 1024):
+        # Spread count blobs over the layout folders in sub-folders of files_per_folder
+        self.max_size = max_size
+        names = self.containers.setdefault(container, [])
+        for i in range(count):
+            folder, extensions = SYNTHETIC_LAYOUT[i % len(SYNTHETIC_LAYOUT)]
+            extension = extensions[(i // len(SYNTHETIC_LAYOUT)) % len(extensions)]
+            group = i // (files_per_folder * len(SYNTHETIC_LAYOUT))
+            names.append(f"{root}{folder}/{group:05d}/15_9-F-{i % 97}_{i:08d}{extension}")
+        names.sort()
+        return self
+
+    def upload(self, container, name, data):
+        names = self.containers.setdefault(container, [])
+        if not self.exists(container, name):
+            bisect.insort(names, name)
+        self.uploaded.setdefault(container, {})[name] = bytes(data)
+
+    def exists(self, container, name):
+        names = self.containers.get(container, [])
+        i = bisect.bisect_left(names, name)
+        return i < len(names) and names[i] == name
+
+    def properties(self, container, name):
+        data = self.uploaded.get(container, {}).get(name)
+        crc = zlib.crc32(name.encode())
+        if data is not None:
+            size = len(data)
+            crc = zlib.crc32(data, crc)
+        elif name.lower().endswith('.las'):
+            size = synthetic_las_size(name)
+        else:
+            size = crc % self.max_size
+        blob = FakeBlobProperties(name, size, f'"0x{crc:08X}"', BASE_TIME + datetime.timedelta(seconds=crc % 86400),
+                                  content_settings_for(name))
+        return blob
+
+    def list_page(self, container, prefix, marker, limit):
+        # Returns the properties for up to limit names after marker, and the next marker
+        if container not in self.containers:
+            raise resource_not_found(f"The specified container does not exist: {container}")
+        names = self.containers[container]
+        start = bisect.bisect_left(names, prefix or '') if marker is None else bisect.bisect_right(names, marker)
+        page = []
+        for i in range(start, min(start + limit, len(names))):
+            if prefix and not names[i].startswith(prefix):
+                break
+            page.append(self.properties(container, names[i]))
+        next_marker = None
+        if len(page) == limit and start + limit < len(names) and names[start + limit].startswith(prefix or ''):
+            next_marker = page[-1].name
+        return page, next_marker
+
+    def walk(self, container, prefix, delimiter):
+        # Yields blobs directly under prefix and one FakeBlobPrefix per "sub-folder",
+        # jumping over each sub-folder with a binary search instead of scanning it.
+        if container not in self.containers:
+            raise resource_not_found(f"The specified container does not exist: {container}")
+        names = self.containers[container]
+        prefix = prefix or ''
+        i = bisect.bisect_left(names, prefix)
+        while i < len(names) and names[i].startswith(prefix):
+            name = names[i]
+            cut = name.find(delimiter, len(prefix))
+            if cut == -1:
+                yield self.properties(container, name)
+                i += 1
+            else:
+                sub_prefix = name[:cut + len(delimiter)]
+                yield FakeBlobPrefix(sub_prefix)
+                i = bisect.bisect_left(names, sub_prefix[:-1] + chr(ord(sub_prefix[-1]) + 1), i)
+
+    def read(self, container, name, offset=0, length=None):
+        if not self.exists(container, name):
+            raise resource_not_found(f"The specified blob does not exist: {name}")
+        data = self.uploaded.get(container, {}).get(name)
+        if data is None and name.lower().endswith('.las'):
+            data = synthetic_las(name)
+        if data is None:
+            size = self.properties(container, name).size
+            end = size if length is None else min(size, offset + length)
+            pattern = name.encode() or b'\0'
+            start = offset % len(pattern)
+            count = max(0, end - offset)
+            repeated = pattern * ((start + count) // len(pattern) + 1)
+            return repeated[start:start + count]
+        end = len(data) if length is None else offset + length
+        return data[offset:end]
+
+# ---- synchronous clients (azure.storage.blob) ----
+
+class FakeDownloader:
+    def __init__(self, store, container, name, offset, length, chunk_size):
+        self._store = store
+        self._container = container
+        self._name = name
+        self._offset = offset or 0
+        self._length = length
+        self._chunk_size = chunk_size
+        self.properties = store.properties(container, name)
+        self.name = name
+        end = self.properties.size if length is None else min(self.properties.size, self._offset + length)
+        self.size = max(0, end - self._offset)
+
+    def readall(self):
+        self._store.calls += 1
+        if self._store.latency:
+            time.sleep(self._store.latency)
+        return self._store.read(self._container, self._name, self._offset, self.size)
+
+    def chunks(self):
+        position = 0
+        while position < self.size:
+            length = min(self._chunk_size, self.size - position)
+            self._store.calls += 1
+            if self._store.latency:
+                time.sleep(self._store.latency)
+            yield self._store.read(self._container, self._name, self._offset + position, length)
+            position += length
+
+class FakeBlobClient:
+    def __init__(self, store, container, name):
+        self._store = store
+        self.container_name = container
+        self.blob_name = name
+
+    def download_blob(self, offset=None, length=None, max_concurrency=1, **kwargs):
+        if not self._store.exists(self.container_name, self.blob_name):
+            raise resource_not_found(f"The specified blob does not exist: {self.blob_name}")
+        return FakeDownloader(self._store, self.container_name, self.blob_name, offset, length, 4 * 1024 * 1024)
+
+    def get_blob_properties(self, **kwargs):
+        self._store.calls += 1
+        if not self._store.exists(self.container_name, self.blob_name):
+            raise resource_not_found(f"The specified blob does not exist: {self.blob_name}")
+        return self._store.properties(self.container_name, self.blob_name)
+
+    def exists(self, **kwargs):
+        return self._store.exists(self.container_name, self.blob_name)
+
+    def upload_blob(self, data, overwrite=False, **kwargs):
+        self._store.upload(self.container_name, self.blob_name, data if isinstance(data, bytes) else data.read())
+
+class FakeContainerClient:
+    def __init__(self, store, container):
+        self._store = store
+        self.container_name = container
+
+    def list_blobs(self, name_starts_with=None, results_per_page=None, **kwargs):
+        marker = None
+        while True:
+            self._store.calls += 1
+            if self._store.latency:
+                time.sleep(self._store.latency)
+            page, marker = self._store.list_page(self.container_name, name_starts_with, marker,
+                                                 results_per_page or self._store.page_size)
+            yield from page
+            if marker is None:
+                return
+
+    def walk_blobs(self, name_starts_with=None, delimiter='/', **kwargs):
+        self._store.calls += 1
+        if self._store.latency:
+            time.sleep(self._store.latency)
+        return self._store.walk(self.container_name, name_starts_with, delimiter)
+
+    def get_blob_client(self, blob):
+        return FakeBlobClient(self._store, self.container_name, blob)
+
+class FakeBlobServiceClient:
+    def __init__(self, store):
+        self._store = store
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def close(self):
+        pass
+
+    def get_container_client(self, container):
+        return FakeContainerClient(self._store, container)
+
+    def get_blob_client(self, container, blob):
+        return FakeBlobClient(self._store, container, blob)
+
+# ---- asynchronous clients (azure.storage.blob.aio) ----
+
+class _AsyncPage:
+    def __init__(self, items):
+        self._items = items
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for item in self._items:
+            yield item
+
+class AsyncFakePageIterator:
+    def __init__(self, store, container, prefix, page_size, continuation_token=None):
+        self._store = store
+        self._container = container
+        self._prefix = prefix
+        self._page_size = page_size
+        self.continuation_token = continuation_token
+        self._done = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._done:
+            raise StopAsyncIteration
+        self._store.calls += 1
+        if self._store.latency:
+            await asyncio.sleep(self._store.latency)
+        page, self.continuation_token = self._store.list_page(self._container, self._prefix, self.continuation_token,
+                                                              self._page_size)
+        self._done = self.continuation_token is None
+        return _AsyncPage(page)
+
+class AsyncFakeItemPaged:
+    def __init__(self, store, container, prefix, page_size):
+        self._store = store
+        self._container = container
+        self._prefix = prefix
+        self._page_size = page_size
+
+    def by_page(self, continuation_token=None):
+        return AsyncFakePageIterator(self._store, self._container, self._prefix, self._page_size, continuation_token)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        async for page in self.by_page():
+            async for item in page:
+                yield item
+
+class AsyncFakeDownloader(FakeDownloader):
+    async def readall(self):
+        self._store.calls += 1
+        if self._store.latency:
+            await asyncio.sleep(self._store.latency)
+        return self._store.read(self._container, self._name, self._offset, self.size)
+
+    async def chunks(self):
+        position = 0
+        while position < self.size:
+            length = min(self._chunk_size, self.size - position)
+            self._store.calls += 1
+            if self._store.latency:
+                await asyncio.sleep(self._store.latency)
+            yield self._store.read(self._container, self._name, self._offset + position, length)
+            position += length
+
+class AsyncFakeBlobClient(FakeBlobClient):
+    async def download_blob(self, offset=None, length=None, max_concurrency=1, **kwargs):
+        if self._store.latency:
+            await asyncio.sleep(self._store.latency)
+        if not self._store.exists(self.container_name, self.blob_name):
+            raise resource_not_found(f"The specified blob does not exist: {self.blob_name}")
+        return AsyncFakeDownloader(self._store, self.container_name, self.blob_name, offset, length, 4 * 1024 * 1024)
+
+    async def get_blob_properties(self, **kwargs):
+        self._store.calls += 1
+        if self._store.latency:
+            await asyncio.sleep(self._store.latency)
+        return FakeBlobClient.get_blob_properties(self)
+
+    async def exists(self, **kwargs):
+        return self._store.exists(self.container_name, self.blob_name)
+
+    async def upload_blob(self, data, overwrite=False, **kwargs):
+        FakeBlobClient.upload_blob(self, data, overwrite)
+
+class AsyncFakeContainerClient(FakeContainerClient):
+    def list_blobs(self, name_starts_with=None, results_per_page=None, **kwargs):
+        return AsyncFakeItemPaged(self._store, self.container_name, name_starts_with,
+                                  results_per_page or self._store.page_size)
+
+    def walk_blobs(self, name_starts_with=None, delimiter='/', **kwargs):
+        return self._walk(name_starts_with, delimiter)
+
+    async def _walk(self, prefix, delimiter):
+        # One simulated round trip per page of walk results
+        for i, item in enumerate(self._store.walk(self.container_name, prefix, delimiter)):
+            if i % self._store.page_size == 0:
+                self._store.calls += 1
+                if self._store.latency:
+                    await asyncio.sleep(self._store.latency)
+            yield item
+
+    def get_blob_client(self, blob):
+        return AsyncFakeBlobClient(self._store, self.container_name, blob)
+
+class AsyncFakeBlobServiceClient(FakeBlobServiceClient):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def close(self):
+        pass
+
+    def get_container_client(self, container):
+        return AsyncFakeContainerClient(self._store, container)
+
+    def get_blob_client(self, container, blob):
+        return AsyncFakeBlobClient(self._store, container, blob)
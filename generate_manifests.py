@@ -1,58 +1,125 @@
 import json
 import os
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from json.encoder import encode_basestring_ascii
+from inventory_store import find_inventory_table, read_inventory_table, iter_inventory_table, atomic_output
+from manifest_builders import load_manifest_builders, builder_for
 
 data_dir = 'data'
 
+# Inventory rows handed to one worker task
+manifest_batch_size = 50000
+
+# Inventories with fewer ready rows than this are built in-process; spawning
+# workers costs more than it saves
+shard_min_rows = 200000
+
+# The only columns manifest generation reads
+MANIFEST_COLUMNS = ['FileName', 'FilePath', 'Category', 'WellID', 'SurveyName', 'Date', 'ReadyForManifest']
+
 def load_inventory():
-    inventory_file = os.path.join(data_dir, 'blob_inventory_enhanced.csv')
-    return pd.read_csv(inventory_file)
+    inventory_file = find_inventory_table('blob_inventory_enhanced', data_dir)
+    return read_inventory_table(inventory_file, columns=MANIFEST_COLUMNS, filters=[('ReadyForManifest', '==', True)])
 
 def create_manifest_entry(row):
-    # Create a manifest entry based on the file's category and metadata
-    entry = {
-        "kind": "osdu:wks:Manifest:1.0.0",
-        "ReferenceData": [],
-        "MasterData": [],
-        "Data": {
-            "WorkProduct": {},
-            "WorkProductComponents": [],
-            "Datasets": []
-        }
-    }
-    
-    # Example: Add file metadata to the appropriate section
-    if row['Category'] == 'Well Logs':
-        entry['MasterData'].append({
-            "WellID": row['WellID'],
-            "FileName": row['FileName'],
-            "FilePath": row['FilePath']
-        })
-    elif row['Category'] == 'Seismic Data':
-        entry['Data']['Datasets'].append({
-            "SurveyName": row['SurveyName'],
-            "FileName": row['FileName'],
-            "FilePath": row['FilePath']
-        })
-    # Add more conditions for other categories as needed
-
-    return entry
-
-def generate_manifests():
-    df = load_inventory()
-    manifests = []
-
-    for _, row in df.iterrows():
-        if row['ReadyForManifest']:
-            manifest_entry = create_manifest_entry(row)
-            manifests.append(manifest_entry)
-
-    # Write the manifests to a JSON file
-    manifest_file = os.path.join(data_dir, 'generated_manifests.json')
-    with open(manifest_file, 'w') as f:
-        json.dump(manifests, f, indent=2)
-
-    print(f"Manifests have been written to {manifest_file}")
+    # Create a manifest entry based on the file's category and metadata; None
+    # for a category without a record section (Unknown)
+    builder = builder_for(row['Category'])
+    return builder.build(row) if builder.section is not None else None
+
+def build_manifest_lines(columns):
+    # columns: {column name: list of string values} for one batch of ready
+    # rows. Returns one NDJSON line per row, serialized here so that worker
+    # processes hand back plain strings. Rows whose category has no record
+    # section (Unknown) get no line, as in manifest_batcher.
+    names = list(columns)
+    builders = load_manifest_builders()
+    category_index = names.index('Category')
+    path_index = names.index('FilePath')
+    texts = {}
+    lines = []
+    for row in zip(*columns.values()):
+        category = row[category_index]
+        if category not in texts:
+            builder = builder_for(category, builders)
+            texts[category] = builder.compile_text(names) if builder.section is not None else None
+        text = texts[category]
+        if text is None:
+            continue
+        lines.append('{"FilePath":' + encode_basestring_ascii(row[path_index]) + ',"manifest":' + text(row) + '}')
+    return lines
+
+def iter_ready_batches(input_file, batch_size):
+    # Column batches of the rows that are ready for a manifest
+    for chunk in iter_inventory_table(input_file, columns=MANIFEST_COLUMNS, batch_size=batch_size):
+        chunk = chunk[chunk['ReadyForManifest'].fillna(False).astype(bool)]
+        if len(chunk):
+            yield {column: chunk[column].fillna('').astype(str).tolist() for column in MANIFEST_COLUMNS if column != 'ReadyForManifest'}
+
+def count_ready_rows(input_file):
+    if input_file.lower().endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return int(pq.read_table(input_file, columns=['ReadyForManifest'])['ReadyForManifest'].to_numpy(zero_copy_only=False).sum())
+    return len(read_inventory_table(input_file, columns=['ReadyForManifest'], filters=[('ReadyForManifest', '==', True)]))
+
+def generate_all_manifests(input_file=None, output_file=None, batch_size=manifest_batch_size, max_workers=None):
+    # Stream manifests for every ready row of the enhanced inventory table to an
+    # NDJSON file of {"FilePath": ..., "manifest": {...}} lines. Batches are built
+    # in worker processes when the inventory is large; at most two batches per
+    # worker are in flight, and lines are written in inventory order.
+    input_file = input_file or find_inventory_table('blob_inventory_enhanced', data_dir)
+    output_file = output_file or os.path.join(data_dir, 'generated_manifests.ndjson')
+    max_workers = max_workers or os.cpu_count() or 1
+    batches = iter_ready_batches(input_file, batch_size)
+    count = 0
+
+    with atomic_output(output_file) as temp_file, open(temp_file, 'w', encoding='utf-8') as f:
+        def write(lines):
+            if lines:
+                f.write('\n'.join(lines))
+                f.write('\n')
+            return len(lines)
+
+        if max_workers == 1 or count_ready_rows(input_file) < shard_min_rows:
+            for columns in batches:
+                count += write(build_manifest_lines(columns))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                pending = []
+                for columns in batches:
+                    pending.append(executor.submit(build_manifest_lines, columns))
+                    if len(pending) >= max_workers * 2:
+                        count += write(pending.pop(0).result())
+                for future in pending:
+                    count += write(future.result())
+
+    print(f"{count} manifests have been written to {output_file}")
+    return count
+
+def iter_manifests(path):
+    # Yields (file path, manifest) from a generated NDJSON manifest file, or
+    # from an older JSON file holding a {file path: manifest} object
+    if path.lower().endswith(('.ndjson', '.jsonl')):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record['FilePath'], record['manifest']
+        return
+    with open(path, 'r') as f:
+        yield from json.load(f).items()
+
+def generate_manifests(delta=False):
+    if delta:
+        # Only the rows the last json_to_csv.py --delta reclassified
+        generate_all_manifests(os.path.join(data_dir, 'blob_inventory_enhanced_delta.parquet'),
+                               os.path.join(data_dir, 'generated_manifests_delta.ndjson'))
+    else:
+        generate_all_manifests()
 
 if __name__ == "__main__":
-    generate_manifests()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate OSDU manifests from the enhanced inventory")
+    parser.add_argument('--delta', action='store_true', help='Build manifests only for the rows reclassified by json_to_csv.py --delta')
+    args = parser.parse_args()
+    generate_manifests(args.delta)
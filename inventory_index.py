@@ -0,0 +1,107 @@
+import os
+import sqlite3
+
+data_dir = 'data'
+default_index_file = os.path.join(data_dir, 'blob_inventory_index.sqlite')
+
+# Local index of the last listing, keyed by container and blob name. A run
+# marks every blob it sees with the run id; rows that changed (etag, size or
+# lastModified) come back as the delta, rows that were not seen were deleted.
+class InventoryIndex:
+    def __init__(self, path=default_index_file):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                container TEXT NOT NULL,
+                name TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER,
+                seen_run INTEGER NOT NULL,
+                PRIMARY KEY (container, name)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY AUTOINCREMENT, container TEXT, prefix TEXT)")
+        self.conn.execute("CREATE TEMP TABLE page (name TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, size INTEGER)")
+        self.conn.commit()
+        self.run_id = None
+        self.container = None
+        self.prefix = None
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.run_id is not None:
+            # A failed run leaves the index exactly as the last good run left it
+            self.conn.rollback()
+        self.close()
+
+    def begin_run(self, container, prefix=''):
+        cursor = self.conn.execute("INSERT INTO runs (container, prefix) VALUES (?, ?)", (container, prefix))
+        self.run_id = cursor.lastrowid
+        self.container = container
+        self.prefix = prefix
+        return self.run_id
+
+    def observe(self, entries):
+        # entries: (name, etag, last_modified, size) tuples for one listing page.
+        # Returns {name: 'added' | 'changed'} for the entries that differ from the index.
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM page")
+        cursor.executemany("INSERT OR REPLACE INTO page VALUES (?, ?, ?, ?)", entries)
+        delta = {
+            name: 'added' if known is None else 'changed'
+            for name, known in cursor.execute("""
+                SELECT p.name, b.name FROM page p
+                LEFT JOIN blobs b ON b.container = ? AND b.name = p.name
+                WHERE b.name IS NULL
+                   OR b.etag IS NOT p.etag
+                   OR b.size IS NOT p.size
+                   OR b.last_modified IS NOT p.last_modified
+            """, (self.container,))
+        }
+        cursor.execute("""
+            INSERT INTO blobs (container, name, etag, last_modified, size, seen_run)
+            SELECT ?, name, etag, last_modified, size, ? FROM page WHERE true
+            ON CONFLICT (container, name) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                size = excluded.size,
+                seen_run = excluded.seen_run
+        """, (self.container, self.run_id))
+        return delta
+
+    def finish_run(self):
+        # Everything under the listed prefix that this run did not see is gone
+        query = "SELECT name FROM blobs WHERE container = ? AND seen_run != ?"
+        params = [self.container, self.run_id]
+        if self.prefix:
+            query += " AND name >= ? AND name < ?"
+            params += [self.prefix, prefix_upper_bound(self.prefix)]
+        deleted = [name for (name,) in self.conn.execute(query, params)]
+        self.conn.executemany("DELETE FROM blobs WHERE container = ? AND name = ?",
+                              [(self.container, name) for name in deleted])
+        return deleted
+
+    def commit_run(self):
+        # Called once the delta the run produced is safely on disk; until then
+        # a failure rolls the index back to the previous run
+        self.conn.commit()
+        self.run_id = None
+
+    def count(self, container):
+        return self.conn.execute("SELECT COUNT(*) FROM blobs WHERE container = ?", (container,)).fetchone()[0]
+
+def prefix_upper_bound(prefix):
+    # Smallest string greater than every string that starts with prefix
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
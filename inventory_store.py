@@ -0,0 +1,322 @@
+import json
+import os
+import shutil
+from contextlib import contextmanager
+
+data_dir = 'data'
+
+# One JSON record per line. Writers append and flush as pages arrive, readers
+# yield one record at a time, so neither side ever holds the full inventory.
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+def is_ndjson(path):
+    return path.lower().endswith(NDJSON_EXTENSIONS)
+
+class NDJSONWriter:
+    def __init__(self, path, default=None):
+        self.path = path
+        self.default = default
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'w', encoding='utf-8')
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+
+    def write(self, record):
+        self._file.write(json.dumps(record, default=self.default, separators=(',', ':')))
+        self._file.write('\n')
+        self.count += 1
+
+    def write_many(self, records):
+        # Serialize the whole page first so it hits the file in one write
+        lines = [json.dumps(record, default=self.default, separators=(',', ':')) for record in records]
+        if lines:
+            self._file.write('\n'.join(lines))
+            self._file.write('\n')
+            self.count += len(lines)
+        self._file.flush()
+
+class CompactInventoryWriter(NDJSONWriter):
+    # Compact inventories start with a header naming the fields; every line
+    # after it is a JSON array holding one blob's values in that order.
+    def __init__(self, path, container, fields, default=None):
+        super().__init__(path, default)
+        self.container = container
+        self.fields = list(fields)
+
+    def __enter__(self):
+        super().__enter__()
+        self._file.write(json.dumps({"format": "compact", "container": self.container, "fields": self.fields}))
+        self._file.write('\n')
+        return self
+
+def is_compact_header(record):
+    return isinstance(record, dict) and record.get('format') == 'compact' and 'fields' in record
+
+def flatten_record(record):
+    # Older inventories nest the blob properties; lift them to the flat field
+    # names used by compact inventories so every reader sees the same keys.
+    properties = record.get('properties')
+    if not isinstance(properties, dict):
+        return record
+    flat = {key: value for key, value in record.items() if key != 'properties'}
+    for key, value in properties.items():
+        if key == 'contentSettings' and isinstance(value, dict):
+            flat.update(value)
+        else:
+            flat[key] = value
+    return flat
+
+def iter_inventory_rows(path):
+    # Yields (fields, container) once, then the raw row lists of a compact inventory
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if not is_compact_header(header):
+            raise ValueError(f"{path} is not a compact inventory")
+        yield header['fields'], header.get('container')
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_inventory(path):
+    if is_ndjson(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            fields = None
+            container = None
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if fields is not None:
+                    record = dict(zip(fields, record))
+                    record['container'] = container
+                elif is_compact_header(record):
+                    fields = record['fields']
+                    container = record.get('container')
+                    continue
+                else:
+                    record = flatten_record(record)
+                yield record
+    else:
+        # Legacy inventories are a single JSON array and have to be loaded whole
+        with open(path, 'r', encoding='utf-8') as f:
+            for record in json.load(f):
+                yield flatten_record(record)
+
+def iter_batches(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_inventory_frames(path, batch_size=100000):
+    # Yields the inventory as DataFrames of up to batch_size flat records. Compact
+    # inventories go straight from row lists to columns without per-record dicts.
+    import pandas as pd
+    if is_ndjson(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            first = f.readline()
+        if first.strip() and is_compact_header(json.loads(first)):
+            rows = iter_inventory_rows(path)
+            fields, container = next(rows)
+            for batch in iter_batches(rows, batch_size):
+                df = pd.DataFrame(batch, columns=fields)
+                df['container'] = container
+                yield df
+            return
+    for batch in iter_batches(iter_inventory(path), batch_size):
+        yield pd.DataFrame.from_records(batch)
+
+@contextmanager
+def atomic_output(path):
+    # Yields a temporary path next to path. It replaces path only when the
+    # block completes, so readers see the old file or the new one, never a
+    # partial write.
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        yield temp_path
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def write_json_atomic(data, path, **kwargs):
+    with atomic_output(path) as temp_path:
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, **kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+
+def find_inventory(base_name, directory=data_dir):
+    # Prefer the streaming format, fall back to an older JSON array inventory
+    for extension in ('.ndjson', '.json'):
+        path = os.path.join(directory, base_name + extension)
+        if os.path.exists(path):
+            return path
+    return os.path.join(directory, base_name + '.ndjson')
+
+# Typed columnar form of the enhanced (classified) inventory. Low-cardinality
+# string columns are dictionary encoded and read back as pandas categoricals.
+CATEGORICAL_COLUMNS = ('FileExtension', 'FileType', 'BlobType', 'BlobTier', 'Container', 'Category', 'OSDUSchema')
+TIMESTAMP_COLUMNS = ('LastModified', 'CreationTime')
+TABLE_EXTENSIONS = ('.parquet', '.csv')
+
+# Rows per Parquet row group; the unit that predicate pushdown can skip
+row_group_size = 100000
+
+def enhanced_schema():
+    import pyarrow as pa
+    category = pa.dictionary(pa.int32(), pa.string())
+    timestamp = pa.timestamp('us', tz='UTC')
+    return pa.schema([
+        ('FileName', pa.string()),
+        ('FilePath', pa.string()),
+        ('FileExtension', category),
+        ('FileSize', pa.int64()),
+        ('LastModified', timestamp),
+        ('FileType', category),
+        ('BlobType', category),
+        ('BlobTier', category),
+        ('CreationTime', timestamp),
+        ('ETag', pa.string()),
+        ('Container', category),
+        ('Category', category),
+        ('OSDUSchema', category),
+        ('WellID', pa.string()),
+        ('SurveyName', pa.string()),
+        ('Date', pa.string()),
+        ('ReadyForManifest', pa.bool_()),
+    ])
+
+def normalize_inventory_frame(df):
+    # Coerce a classified inventory DataFrame to the column types of enhanced_schema
+    import pandas as pd
+    df = df.copy()
+    for column in TIMESTAMP_COLUMNS:
+        if column in df:
+            df[column] = pd.to_datetime(df[column], utc=True, errors='coerce', format='ISO8601')
+    if 'FileSize' in df:
+        df['FileSize'] = pd.to_numeric(df['FileSize'], errors='coerce').astype('Int64')
+    for column in ('WellID', 'SurveyName', 'Date', 'ETag', 'FileName', 'FilePath'):
+        if column in df:
+            df[column] = df[column].fillna('').astype(str)
+    for column in CATEGORICAL_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('category')
+    if 'ReadyForManifest' in df:
+        df['ReadyForManifest'] = df['ReadyForManifest'].astype(bool)
+    return df
+
+class ParquetInventoryWriter:
+    # Appends classified batches to one Parquet file with a fixed schema
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._writer = None
+
+    def __enter__(self):
+        import pyarrow.parquet as pq
+        self._schema = enhanced_schema()
+        self._writer = pq.ParquetWriter(self.path, self._schema, compression='zstd')
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._writer.close()
+
+    def write(self, df):
+        import pyarrow as pa
+        table = pa.Table.from_pandas(normalize_inventory_frame(df), schema=self._schema, preserve_index=False)
+        self._writer.write_table(table, row_group_size=row_group_size)
+        self.count += len(df)
+
+def write_inventory_table(df, path):
+    if path.lower().endswith('.csv'):
+        df.to_csv(path, index=False)
+        return
+    with ParquetInventoryWriter(path) as writer:
+        writer.write(df)
+
+def apply_filters(df, filters):
+    # Row filtering for CSV inputs, using the same [(column, op, value), ...]
+    # form that pyarrow pushes down into Parquet row groups.
+    ops = {
+        '==': lambda s, v: s == v,
+        '=': lambda s, v: s == v,
+        '!=': lambda s, v: s != v,
+        '<': lambda s, v: s < v,
+        '<=': lambda s, v: s <= v,
+        '>': lambda s, v: s > v,
+        '>=': lambda s, v: s >= v,
+        'in': lambda s, v: s.isin(v),
+        'not in': lambda s, v: ~s.isin(v),
+    }
+    for column, op, value in filters:
+        df = df[ops[op](df[column], value)]
+    return df.reset_index(drop=True)
+
+def read_inventory_table(path, columns=None, filters=None):
+    # Read only the requested columns; with Parquet, filters skip whole row
+    # groups using their statistics before any rows are decoded.
+    import pandas as pd
+    if path.lower().endswith('.csv'):
+        usecols = None
+        if columns is not None:
+            usecols = list(dict.fromkeys(list(columns) + [column for column, _, _ in filters or []]))
+        df = pd.read_csv(path, usecols=usecols)
+        if filters:
+            df = apply_filters(df, filters)
+            if columns is not None:
+                df = df[list(columns)]
+        return df
+    return pd.read_parquet(path, engine='pyarrow', columns=list(columns) if columns is not None else None, filters=filters)
+
+def find_inventory_table(base_name, directory=data_dir):
+    # Prefer the typed Parquet table, fall back to the CSV an older run wrote
+    for extension in TABLE_EXTENSIONS:
+        path = os.path.join(directory, base_name + extension)
+        if os.path.exists(path):
+            return path
+    return os.path.join(directory, base_name + TABLE_EXTENSIONS[0])
+
+def iter_inventory_table(path, columns=None, batch_size=500000):
+    # Yields an enhanced inventory table as DataFrame chunks of up to batch_size rows
+    import pandas as pd
+    if path.lower().endswith('.csv'):
+        yield from pd.read_csv(path, usecols=columns, chunksize=batch_size)
+        return
+    import pyarrow.parquet as pq
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
+
+def concat_inventory_tables(part_paths, path):
+    # Join Parquet parts written with enhanced_schema without going through pandas
+    import pyarrow.parquet as pq
+    with pq.ParquetWriter(path, enhanced_schema(), compression='zstd') as writer:
+        for part in part_paths:
+            writer.write_table(pq.read_table(part, schema=enhanced_schema()), row_group_size=row_group_size)
+
+def concat_csv(part_paths, path):
+    # Join CSV parts that each start with the same header line
+    with open(path, 'wb') as out:
+        for i, part in enumerate(part_paths):
+            with open(part, 'rb') as f:
+                header = f.readline()
+                if i == 0:
+                    out.write(header)
+                shutil.copyfileobj(f, out)
@@ -1,34 +1,51 @@
+import argparse
 import json
-import csv
 import os
 import re
 from datetime import datetime
 from collections import Counter, defaultdict
+from functools import lru_cache
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-from concurrent.futures import ProcessPoolExecutor, as_completed
-import lasio
-from azure.storage.blob import BlobServiceClient
-import io   
-from dotenv import load_dotenv
-import os
+import asyncio
 import logging
-from tqdm import tqdm
 import signal
+from inventory_store import (iter_inventory, iter_inventory_frames, find_inventory, ParquetInventoryWriter,
+                             read_inventory_table, write_inventory_table, normalize_inventory_frame,
+                             iter_inventory_table, atomic_output, write_json_atomic, concat_csv,
+                             concat_inventory_tables)
+from visualizations import BackgroundRenderer, render_inventory_charts
 
-load_dotenv()  # This loads the variables from .env
-
-   # Then use os.getenv to get the variables
-account_url = os.getenv('AZURE_STORAGE_ACCOUNT_URL')
-sas_token = os.getenv('AZURE_STORAGE_SAS_TOKEN')
 data_dir = 'data'
 
-def signal_handler(signum, frame):
-    print("\nInterrupted. Saving progress...")
-    raise KeyboardInterrupt
+# Inventory records classified per batch; also the unit the journal resumes from
+classify_batch_size = 100000
 
-signal.signal(signal.SIGINT, signal_handler)
+# Rows summarized per chunk when kinds_summary is built from the table
+summary_chunk_size = 500000
+
+def storage_credentials():
+    # Read when a run needs storage, not at import time
+    from dotenv import load_dotenv
+    load_dotenv()  # This loads the variables from .env
+    account_url = os.getenv('AZURE_STORAGE_ACCOUNT_URL')
+    sas_token = os.getenv('AZURE_STORAGE_SAS_TOKEN')
+    if not account_url or not sas_token:
+        raise ValueError("Azure Storage account URL or SAS token not found. Make sure AZURE_STORAGE_ACCOUNT_URL and AZURE_STORAGE_SAS_TOKEN are set in your .env file.")
+    return account_url, sas_token
+
+def interrupt_handler(journal):
+    # SIGINT commits what the journal holds before the run unwinds. Forked
+    # worker processes inherit the handler but must not touch the journal.
+    owner = os.getpid()
+    def signal_handler(signum, frame):
+        if os.getpid() != owner:
+            raise KeyboardInterrupt
+        print("\nInterrupted. Saving progress...")
+        journal.save()
+        print(f"Progress saved to {journal.path}. Run again to resume.")
+        raise KeyboardInterrupt
+    return signal_handler
 
 
 def make_serializable(obj):
@@ -46,47 +63,62 @@ def make_serializable(obj):
     raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
 
 
+# File extension -> (category, OSDU schema)
+CATEGORIES = {
+    '.las': ('Well Logs', 'Well Log'),
+    '.dlis': ('Well Logs', 'Well Log'),
+    '.segy': ('Seismic Data', 'Seismic'),
+    '.sgy': ('Seismic Data', 'Seismic'),
+    '.xml': ('Real-Time Drilling Data', 'Wellbore Trajectory'),
+    '.witsml': ('Real-Time Drilling Data', 'Wellbore Trajectory'),
+    '.csv': ('Production Data', 'Production Data'),
+    '.json': ('Production Data', 'Production Data'),
+    '.grdecl': ('Reservoir Models', 'Reservoir'),
+    '.rms': ('Reservoir Models', 'Reservoir'),
+    '.pdf': ('Documents', 'Work Product'),
+    '.docx': ('Documents', 'Work Product'),
+    '.xlsx': ('Documents', 'Work Product'),
+    '.p1': ('Seismic Data', 'SeismicLineGeometry'),
+    '.p11': ('Seismic Data', 'SeismicLineGeometry'),
+    '.p6': ('Seismic Data', 'SeismicBinGrid'),
+    '.resqml': ('Geophysical Interpretation', 'SeismicHorizon')
+}
+CATEGORY_BY_EXTENSION = {extension: category for extension, (category, _) in CATEGORIES.items()}
+SCHEMA_BY_EXTENSION = {extension: schema for extension, (_, schema) in CATEGORIES.items()}
+
+# Folder keywords used when the extension is unknown, checked in this order
+FOLDER_CATEGORIES = [
+    (('well_logs',), ('Well Logs', 'Well Log')),
+    (('seismic',), ('Seismic Data', 'Seismic')),
+    (('production',), ('Production Data', 'Production Data')),
+    (('reservoir',), ('Reservoir Models', 'Reservoir')),
+    (('witsml', 'drilling'), ('Real-Time Drilling Data', 'Wellbore Trajectory')),
+    (('wellbore',), ('Wellbore Data', 'Wellbore')),
+    (('marker', 'horizon'), ('Markers and Horizons', 'Markers and Horizons')),
+]
+
+WELL_ID_PATTERN = re.compile(r'([A-Z0-9-]+)')
+SURVEY_NAME_PATTERN = re.compile(r'([A-Z0-9-]+)_survey', re.IGNORECASE)
+DATE_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})')
+# Same result as os.path.splitext(name)[1]: leading dots do not start an extension
+EXTENSION_PATTERN = re.compile(r'^\.*[^.].*(\.[^.]*)$')
+
+REQUIRED_FIELDS = {
+    'Well Logs': ['WellID'],
+    'Seismic Data': ['SurveyName'],
+    'Production Data': ['Date']
+}
+
 def get_file_category_and_schema(file_name, file_path):
     extension = os.path.splitext(file_name)[1].lower()
-    folder_name = os.path.dirname(file_path).lower()
-    
-    categories = {
-        '.las': ('Well Logs', 'Well Log'),
-        '.dlis': ('Well Logs', 'Well Log'),
-        '.segy': ('Seismic Data', 'Seismic'),
-        '.sgy': ('Seismic Data', 'Seismic'),
-        '.xml': ('Real-Time Drilling Data', 'Wellbore Trajectory'),
-        '.witsml': ('Real-Time Drilling Data', 'Wellbore Trajectory'),
-        '.csv': ('Production Data', 'Production Data'),
-        '.json': ('Production Data', 'Production Data'),
-        '.grdecl': ('Reservoir Models', 'Reservoir'),
-        '.rms': ('Reservoir Models', 'Reservoir'),
-        '.pdf': ('Documents', 'Work Product'),
-        '.docx': ('Documents', 'Work Product'),
-        '.xlsx': ('Documents', 'Work Product'),
-        '.p1': ('Seismic Data', 'SeismicLineGeometry'),
-        '.p11': ('Seismic Data', 'SeismicLineGeometry'),
-        '.p6': ('Seismic Data', 'SeismicBinGrid'),
-        '.resqml': ('Geophysical Interpretation', 'SeismicHorizon')
-    }
     
-    category, schema = categories.get(extension, ('Unknown', 'Unknown'))
+    category, schema = CATEGORIES.get(extension, ('Unknown', 'Unknown'))
     
     if category == 'Unknown':
-        if 'well_logs' in folder_name:
-            return 'Well Logs', 'Well Log'
-        elif 'seismic' in folder_name:
-            return 'Seismic Data', 'Seismic'
-        elif 'production' in folder_name:
-            return 'Production Data', 'Production Data'
-        elif 'reservoir' in folder_name:
-            return 'Reservoir Models', 'Reservoir'
-        elif 'witsml' in folder_name or 'drilling' in folder_name:
-            return 'Real-Time Drilling Data', 'Wellbore Trajectory'
-        elif 'wellbore' in folder_name:
-            return 'Wellbore Data', 'Wellbore'
-        elif 'marker' in folder_name or 'horizon' in folder_name:
-            return 'Markers and Horizons', 'Markers and Horizons'
+        folder_name = os.path.dirname(file_path).lower()
+        for keywords, category_and_schema in FOLDER_CATEGORIES:
+            if any(keyword in folder_name for keyword in keywords):
+                return category_and_schema
     
     return category, schema
 
@@ -94,50 +126,113 @@ def extract_metadata(file_name, file_path, category):
     metadata = {}
     
     if category == 'Well Logs':
-        well_id_match = re.search(r'([A-Z0-9-]+)', file_name)
+        well_id_match = WELL_ID_PATTERN.search(file_name)
         if well_id_match:
             metadata['WellID'] = well_id_match.group(1)
     
     elif category == 'Seismic Data':
-        survey_name_match = re.search(r'([A-Z0-9-]+)_survey', file_name, re.IGNORECASE)
+        survey_name_match = SURVEY_NAME_PATTERN.search(file_name)
         if survey_name_match:
             metadata['SurveyName'] = survey_name_match.group(1)
     
-    date_match = re.search(r'(\d{4}-\d{2}-\d{2})', file_name)
+    date_match = DATE_PATTERN.search(file_name)
     if date_match:
         metadata['Date'] = date_match.group(1)
     
     return metadata
 
 def all_required_metadata_present(category, osdu_schema, metadata):
-    required_fields = {
-        'Well Logs': ['WellID'],
-        'Seismic Data': ['SurveyName'],
-        'Production Data': ['Date']
-    }
-    
-    if category in required_fields:
-        return all(field in metadata and metadata[field] for field in required_fields[category])
+    if category in REQUIRED_FIELDS:
+        return all(field in metadata and metadata[field] for field in REQUIRED_FIELDS[category])
     return True
 
+def extract_where(file_names, mask, pattern):
+    # Run a precompiled regex over only the rows selected by mask
+    values = pd.Series('', index=file_names.index, dtype=object)
+    if mask.any():
+        values[mask] = file_names[mask].str.extract(pattern, expand=False).fillna('')
+    return values
+
+# Columns of the enhanced inventory, in order
+ENHANCED_COLUMNS = ['FileName', 'FilePath', 'FileExtension', 'FileSize', 'LastModified', 'FileType', 'BlobType',
+                    'BlobTier', 'CreationTime', 'ETag', 'Container', 'Category', 'OSDUSchema', 'WellID',
+                    'SurveyName', 'Date', 'ReadyForManifest']
+
+def classify_inventory(blobs):
+    # Column-at-a-time equivalent of process_blob over a DataFrame of flat
+    # inventory records (name, contentLength, lastModified, ...).
+    if blobs.empty:
+        return pd.DataFrame(columns=ENHANCED_COLUMNS)
+    paths = blobs['name'].astype(str)
+    file_names = paths.str.rpartition('/')[2]
+    extensions = file_names.str.extract(EXTENSION_PATTERN, expand=False).fillna('').str.lower()
+
+    categories = extensions.map(CATEGORY_BY_EXTENSION)
+    schemas = extensions.map(SCHEMA_BY_EXTENSION)
+    unknown = categories.isna()
+    if unknown.any():
+        folders = paths[unknown].str.rpartition('/')[0].str.lower()
+        conditions = []
+        for keywords, _ in FOLDER_CATEGORIES:
+            condition = folders.str.contains(keywords[0], regex=False)
+            for keyword in keywords[1:]:
+                condition |= folders.str.contains(keyword, regex=False)
+            conditions.append(condition.to_numpy())
+        categories[unknown] = np.select(conditions, [category for _, (category, _) in FOLDER_CATEGORIES], 'Unknown')
+        schemas[unknown] = np.select(conditions, [schema for _, (_, schema) in FOLDER_CATEGORIES], 'Unknown')
+
+    well_ids = extract_where(file_names, categories == 'Well Logs', WELL_ID_PATTERN)
+    survey_names = extract_where(file_names, categories == 'Seismic Data', SURVEY_NAME_PATTERN)
+    dates = file_names.str.extract(DATE_PATTERN, expand=False).fillna('')
+
+    ready = pd.Series(True, index=blobs.index)
+    for category, fields in REQUIRED_FIELDS.items():
+        in_category = categories == category
+        for field in fields:
+            values = {'WellID': well_ids, 'SurveyName': survey_names, 'Date': dates}[field]
+            ready &= ~in_category | (values != '')
+
+    def column(name, default=None):
+        return blobs[name] if name in blobs else pd.Series(default, index=blobs.index, dtype=object)
+
+    return pd.DataFrame({
+        'FileName': file_names,
+        'FilePath': paths,
+        'FileExtension': extensions,
+        'FileSize': column('contentLength'),
+        'LastModified': column('lastModified'),
+        'FileType': column('contentType'),
+        'BlobType': column('blobType'),
+        'BlobTier': column('blobTier', ''),
+        'CreationTime': column('creationTime'),
+        'ETag': column('etag'),
+        'Container': column('container'),
+        'Category': categories,
+        'OSDUSchema': schemas,
+        'WellID': well_ids,
+        'SurveyName': survey_names,
+        'Date': dates,
+        'ReadyForManifest': ready
+    })
+
 def process_blob(blob):
     file_name = os.path.basename(blob['name'])
     file_extension = os.path.splitext(file_name)[1].lower()
     category, osdu_schema = get_file_category_and_schema(file_name, blob['name'])
     metadata = extract_metadata(file_name, blob['name'], category)
-    file_size = blob['properties']['contentLength']
+    file_size = blob['contentLength']
     
     return {
         'FileName': file_name,
         'FilePath': blob['name'],
         'FileExtension': file_extension,
         'FileSize': file_size,
-        'LastModified': blob['properties']['lastModified'],
-        'FileType': blob['properties']['contentSettings']['contentType'],
-        'BlobType': blob['properties']['blobType'],
-        'BlobTier': blob['properties'].get('blobTier', ''),
-        'CreationTime': blob['properties']['creationTime'],
-        'ETag': blob['properties']['etag'],
+        'LastModified': blob['lastModified'],
+        'FileType': blob['contentType'],
+        'BlobType': blob['blobType'],
+        'BlobTier': blob.get('blobTier', ''),
+        'CreationTime': blob['creationTime'],
+        'ETag': blob['etag'],
         'Container': blob['container'],
         'Category': category,
         'OSDUSchema': osdu_schema,
@@ -148,293 +243,324 @@ def process_blob(blob):
     }
 
 
-import os
-import lasio
-import logging
-from azure.storage.blob import BlobServiceClient
-
 def extract_las_data(container_name, blob_name):
-    connect_str = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
-    if not account_url or not sas_token:
-        raise ValueError("Azure Storage account URL or SAS token not found. Make sure AZURE_STORAGE_ACCOUNT_URL and AZURE_STORAGE_SAS_TOKEN are set in your .env file.")
+    from azure.storage.blob import BlobServiceClient
+    from las_extraction import parse_las_bytes
+    account_url, sas_token = storage_credentials()
 
     # Create the BlobServiceClient
     blob_service_client = BlobServiceClient(account_url=account_url, credential=sas_token)
     blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_name)
     
     try:
-        # Create a local directory to store downloaded files
-        os.makedirs('data/temp', exist_ok=True)
-        
-        # Define the local file path
-        local_file_path = os.path.join('data/temp', os.path.basename(blob_name))
-        
-        # Download the blob to a local file
-        with open(local_file_path, "wb") as local_file:
-            download_stream = blob_client.download_blob()
-            local_file.write(download_stream.readall())
-        
-        # Read the LAS file from the local directory
-        try:
-            las = lasio.read(local_file_path)
-        except Exception as e:
-            logging.error(f"Error reading LAS file {blob_name}: {str(e)}")
-            return None
-        
-        well_data = {
-            'filename': blob_name,
-            'well': las.well.get('WELL', {}).value or 'NA',
-            'company': las.well.get('COMP', {}).value or 'NA',
-            'field': las.well.get('FLD', {}).value or 'NA',
-            'country': las.well.get('CTRY', {}).value or 'NA',
-            'start_depth': las.well.get('STRT', {}).value,
-            'stop_depth': las.well.get('STOP', {}).value,
-            'step': las.well.get('STEP', {}).value,
-            'null_value': las.well.get('NULL', {}).value,
-            'curve_names': [curve.mnemonic for curve in las.curves],
-            'curve_units': [curve.unit for curve in las.curves],
-            'curve_descriptions': [curve.descr for curve in las.curves],
-            'curve_data': []
-        }
-
-        for curve in las.curves:
-            try:
-                data = curve.data.tolist()
-            except AttributeError:
-                data = [str(value) for value in curve.data]  # Convert to strings if not numeric
-            well_data['curve_data'].append(data)
-        
-        # Create the manifests directory if it doesn't exist
-        os.makedirs('./data/manifests', exist_ok=True)
-        
-        base_name = os.path.splitext(os.path.basename(blob_name))[0]
-        json_filename = f"well-log-{well_data['well']}-{well_data['company']}"
-        json_filename = re.sub(r'[^\w\-_\.]', '_', json_filename)  # Replace invalid characters with underscore
-        json_filename = f"{json_filename}.json"
-        json_filepath = os.path.join('./data/manifests', json_filename)
-        
-        # Write the well data to a JSON file
-        with open(json_filepath, 'w') as json_file:
-            json.dump(well_data, json_file, indent=2)
-        
-        logging.info(f"Well data written to {json_filepath}")
-        
-        # Remove the local file after processing
-        os.remove(local_file_path)
-        
-        return well_data
+        # Parse the LAS file from the downloaded bytes, no temp file needed
+        return parse_las_bytes(container_name, blob_name, blob_client.download_blob().readall())
     except Exception as e:
         logging.error(f"Error processing {blob_name}: {str(e)}")
         return None
-          
-def main():
-    input_file = os.path.join(data_dir, 'blob_inventory_volve.json')
-    with open(input_file, 'r') as json_file:
-        blobs = json.load(json_file)
-
-    # Azure Blob Storage connection string
-    # connect_str = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
-    # if not account_url or not sas_token:
-    #     raise ValueError("Azure Storage account URL or SAS token not found. Make sure AZURE_STORAGE_ACCOUNT_URL and AZURE_STORAGE_SAS_TOKEN are set in your .env file.")
 
-    #     # Create the BlobServiceClient
-    # blob_service_client = BlobServiceClient(account_url=account_url, credential=sas_token)
-
-
-    wells_data = []
+def run_las_extraction(las_blobs, on_result, header_only=False, cache=None):
+    # las_blobs: {container: [(blob_name, size, etag), ...]}
+    # on_result(container_name, blob_name, well_data) is called as each blob finishes.
+    # Storage credentials are only needed once a blob is left to download.
+    from las_extraction import extract_las_container, take_cached
+    pending = {}
+    for container_name, blobs in las_blobs.items():
+        if cache is not None:
+            def on_cached(blob_name, well_data, container_name=container_name):
+                on_result(container_name, blob_name, well_data)
+            blobs = take_cached(cache, container_name, blobs, on_cached, header_only)
+        if blobs:
+            pending[container_name] = blobs
+    if not pending:
+        return
 
-    total_files = len([blob for blob in blobs if blob['name'].lower().endswith('.las')])
-    
-    with tqdm(total=len(blobs), desc="Processing LAS files") as pbar:
-        for blob in blobs:
+    from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+    account_url, sas_token = storage_credentials()
+    for container_name, blobs in pending.items():
+        blob_service_client = AsyncBlobServiceClient(account_url=account_url, credential=sas_token)
+        def on_blob(blob_name, well_data, container_name=container_name):
+            on_result(container_name, blob_name, well_data)
+        asyncio.run(extract_las_container(blob_service_client, container_name, blobs, on_blob, header_only=header_only, cache=cache))
+
+def process_inventory(input_file):
+    frames = [classify_inventory(blobs) for blobs in iter_inventory_frames(input_file)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def write_enhanced_inventory(input_file, output_file, table_file, batch_size=100000, journal=None):
+    # Classify the inventory one batch at a time and append each batch to the CSV
+    # and the Parquet table, so only batch_size raw blob records are ever held in memory.
+    # Both outputs are written to temporary files and only replace the previous
+    # ones once complete.
+    if journal is not None:
+        return write_enhanced_inventory_parts(input_file, output_file, table_file, batch_size, journal)
+    total = 0
+    with atomic_output(output_file) as csv_file, atomic_output(table_file) as parquet_file:
+        # The header is written up front, so an empty inventory still gives
+        # both outputs
+        pd.DataFrame(columns=ENHANCED_COLUMNS).to_csv(csv_file, index=False)
+        with ParquetInventoryWriter(parquet_file) as table:
+            for blobs in iter_inventory_frames(input_file, batch_size):
+                batch_df = classify_inventory(blobs)
+                batch_df.to_csv(csv_file, mode='a', header=False, index=False)
+                table.write(batch_df)
+                total += len(batch_df)
+    return total
+
+def write_enhanced_inventory_parts(input_file, output_file, table_file, batch_size, journal):
+    # Resumable form: every classified batch becomes a CSV and a Parquet part
+    # recorded in the journal, and batches already recorded are not classified
+    # again. The parts are joined into the outputs at the end.
+    done = journal.completed_batches()
+    if done:
+        print(f"Resuming classification after {done} journaled batches")
+    count = done
+    for batch, blobs in enumerate(iter_inventory_frames(input_file, batch_size)):
+        if batch < done:
+            continue
+        batch_df = classify_inventory(blobs)
+        with atomic_output(journal.part_path(batch, '.csv')) as part:
+            batch_df.to_csv(part, index=False)
+        with atomic_output(journal.part_path(batch, '.parquet')) as part:
+            write_inventory_table(batch_df, part)
+        journal.record_batch(batch, len(batch_df))
+        count = batch + 1
+
+    csv_parts = [journal.part_path(batch, '.csv') for batch in range(count)]
+    table_parts = [journal.part_path(batch, '.parquet') for batch in range(count)]
+    with atomic_output(output_file) as csv_file, atomic_output(table_file) as parquet_file:
+        concat_csv(csv_parts, csv_file)
+        concat_inventory_tables(table_parts, parquet_file)
+    return journal.journaled_rows()
+
+def apply_inventory_delta(delta_file, output_file, table_file, delta_table_file=None):
+    # Reclassify only the added/changed blobs of a delta inventory and drop the
+    # deleted and superseded rows from the existing enhanced inventory. The
+    # reclassified rows alone also go to delta_table_file, if given, so manifest
+    # generation can follow just the delta.
+    frames = list(iter_inventory_frames(delta_file))
+    blobs = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['name', 'change'])
+    touched = set(blobs['name'])
+    upserts = blobs[blobs['change'] != 'deleted'].reset_index(drop=True)
+    # A delta with no changes, or only deletions, has nothing to classify
+    delta_df = classify_inventory(upserts) if len(upserts) else pd.DataFrame(columns=ENHANCED_COLUMNS)
+
+    previous_file = table_file if os.path.exists(table_file) else output_file
+    if os.path.exists(previous_file):
+        df = read_inventory_table(previous_file)
+        df = df[~df['FilePath'].isin(touched)]
+        df = pd.concat([normalize_inventory_frame(df), normalize_inventory_frame(delta_df)], ignore_index=True)
+    else:
+        df = delta_df
+    with atomic_output(output_file) as csv_file, atomic_output(table_file) as parquet_file:
+        df.to_csv(csv_file, index=False)
+        write_inventory_table(df, parquet_file)
+    if delta_table_file:
+        with atomic_output(delta_table_file) as parquet_file:
+            write_inventory_table(normalize_inventory_frame(delta_df), parquet_file)
+    return len(delta_df), len(touched) - len(delta_df)
+
+def main(delta=False, las_headers_only=False, use_cache=True, visualize=True):
+    from tqdm import tqdm
+    from extraction_cache import ExtractionCache
+    from progress_journal import ProgressJournal, input_identity
+
+    if delta:
+        input_file = os.path.join(data_dir, 'blob_inventory_volve_delta.ndjson')
+    else:
+        input_file = find_inventory('blob_inventory_volve')
+
+    # A journal left by an interrupted run over this same input is picked up
+    run_key = {'input': input_identity(input_file), 'delta': delta, 'las_headers_only': las_headers_only,
+               'batch_size': classify_batch_size}
+    with ProgressJournal(run_key) as journal:
+        signal.signal(signal.SIGINT, interrupt_handler(journal))
+        completed = journal.completed_las()
+        if completed:
+            print(f"Resuming from {journal.path}: {len(completed)} LAS files already extracted")
+
+        wells_data = list(completed.values())
+        # Names a delta touches; a full run replaces the outputs and needs none
+        touched = set() if delta else None
+        las_blobs = defaultdict(list)
+        las_total = 0
+
+        for blob in iter_inventory(input_file):
             file_name = blob['name']
-            print(file_name)
+            if delta:
+                touched.add(file_name)
+            if blob.get('change') == 'deleted':
+                continue
             if file_name.lower().endswith('.las'):
-                try:
-                    well_data = extract_las_data(blob['container'], file_name)
-                    if well_data:
-                        wells_data.append(well_data)
-                except Exception as e:
-                    logging.error(f"Error processing {file_name}: {str(e)}")
-                finally:
-                    pbar.update(1)
-
-    # for blob in blobs:
-    #     file_name = blob['name']
-    #     if file_name.lower().endswith('.las'):
-    #         logging.info(f"Processing LAS file: {file_name}")
-    #         try:
-    #             well_data = extract_las_data(blob['container'], file_name)
-    #             wells_data.append(well_data)
-    #         except Exception as e:
-    #             logging.error(f"Error processing {file_name}: {str(e)}")
-    #             continue  # Skip to the next file on error
-
-    # Save the extracted data to a JSON file
-    output_file = os.path.join(data_dir, 'wells-from-las.json')
-    with open(output_file, 'w') as json_file:
-        json.dump(wells_data, json_file, indent=2)
-
-    print(f"Extracted well data has been written to {output_file}")
-
-    with ProcessPoolExecutor() as executor:
-        results = list(executor.map(process_blob, blobs))
-
-    df = pd.DataFrame(results)
-    
-    output_file = os.path.join(data_dir, 'blob_inventory_enhanced.csv')
-    df.to_csv(output_file, index=False)
-
-    kinds_summary = generate_summary(df)
-
-    summary_file = os.path.join(data_dir, 'kinds_summary.json')
-    with open(summary_file, 'w') as json_file:
-        json.dump(kinds_summary, json_file, indent=2, default=make_serializable)
-
-
-    generate_visualizations(df, kinds_summary)
-
-    print(f"Enhanced blob inventory has been written to {output_file}")
-    print(f"Kinds summary has been written to {summary_file}")
-    print("Visualizations have been generated.")
-
-def generate_summary(df):
-    # Load OSDU file types
-    with open(os.path.join('data', 'osdu-types.json'), 'r') as f:
-        osdu_types = json.load(f)
-    
-    # Create a set of OSDU extensions for quick lookup
-    osdu_extensions = {filetype['extension'].lower() for filetype in osdu_types['filetypes']}
-
-    # Convert FileSize to numeric, coercing errors to NaN
-    df['FileSize'] = pd.to_numeric(df['FileSize'], errors='coerce')
-
-    # Print out any rows where FileSize is NaN to debug
-    if df['FileSize'].isnull().any():
-        print("Non-numeric FileSize entries found:")
-        print(df[df['FileSize'].isnull()])
-
-    unknown_count = df['Category'].value_counts().get('Unknown', 0)
-    total_files = len(df)
-
-    # Count total occurrences of each file extension
-    extension_counts = df['FileExtension'].value_counts().to_dict()
-
-    kinds_summary = {
-        'kinds': {},
-        'unknown_count': unknown_count,
-        'total_files': total_files,
-        'total_size': df['FileSize'].sum()
-    }
-
-    for category in df['Category'].unique():
-        if category != 'Unknown':
-            category_df = df[df['Category'] == category]
-            kinds_summary['kinds'][category] = {
-                'count': len(category_df),
-                'folders': category_df['FilePath'].apply(os.path.dirname).unique().tolist(),
-                'filetypes': [],
-                'size_stats': {
-                    'total': category_df['FileSize'].sum(),
-                    'avg': category_df['FileSize'].mean(),
-                    'min': category_df['FileSize'].min(),
-                    'max': category_df['FileSize'].max()
-                }
-            }
-            
-            for ext in category_df['FileExtension'].unique():
-                filetype_info = {
-                    'extension': ext,
-                    'count': extension_counts.get(ext, 0),
-                    'in_osdu': ext.lower() in osdu_extensions
-                }
-                kinds_summary['kinds'][category]['filetypes'].append(filetype_info)
-
-    return kinds_summary
-    # Load OSDU file types
-    with open(os.path.join('data', 'osdu-types.json'), 'r') as f:
+                las_total += 1
+                if (blob['container'], file_name) not in completed:
+                    las_blobs[blob['container']].append((file_name, blob.get('contentLength'), blob.get('etag')))
+
+        with tqdm(total=las_total, initial=las_total - sum(len(blobs) for blobs in las_blobs.values()),
+                  desc="Processing LAS files") as pbar:
+            def on_result(container_name, file_name, well_data):
+                if well_data:
+                    wells_data.append(well_data)
+                    journal.record_las(container_name, file_name, well_data)
+                pbar.update(1)
+
+            if use_cache:
+                with ExtractionCache() as cache:
+                    run_las_extraction(las_blobs, on_result, header_only=las_headers_only, cache=cache)
+                    stats = cache.stats()
+                print(f"LAS extraction cache: {stats['hits']} hits, {stats['misses']} misses, "
+                      f"{stats['evictions']} evictions, {stats['entries']} entries ({stats['bytes']} bytes)")
+            else:
+                run_las_extraction(las_blobs, on_result, header_only=las_headers_only)
+        journal.save()
+
+        # Save the extracted data to a JSON file
+        output_file = os.path.join(data_dir, 'wells-from-las.json')
+        if delta and os.path.exists(output_file):
+            # Keep wells from files the delta did not touch
+            with open(output_file, 'r') as json_file:
+                previous = json.load(json_file)
+            wells_data = [well for well in previous if well['filename'] not in touched] + wells_data
+        write_json_atomic(wells_data, output_file, indent=2)
+
+        print(f"Extracted well data has been written to {output_file}")
+
+        output_file = os.path.join(data_dir, 'blob_inventory_enhanced.csv')
+        table_file = os.path.join(data_dir, 'blob_inventory_enhanced.parquet')
+        if delta:
+            delta_table_file = os.path.join(data_dir, 'blob_inventory_enhanced_delta.parquet')
+            updated, removed = apply_inventory_delta(input_file, output_file, table_file, delta_table_file)
+            print(f"Delta applied: {updated} blobs reclassified, {removed} removed; "
+                  f"reclassified rows written to {delta_table_file}")
+        else:
+            write_enhanced_inventory(input_file, output_file, table_file, classify_batch_size, journal)
+
+        kinds_summary = generate_summary_chunked(table_file)
+
+        summary_file = os.path.join(data_dir, 'kinds_summary.json')
+        write_json_atomic(kinds_summary, summary_file, indent=2, default=make_serializable)
+
+        print(f"Enhanced blob inventory has been written to {output_file} and {table_file}")
+        print(f"Kinds summary has been written to {summary_file}")
+
+        # Every output is written; a rerun starts from scratch. An applied delta
+        # is consumed, so the next query_blob_storage.py --delta starts a new one
+        if delta:
+            os.remove(input_file)
+        journal.remove()
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    # Charts are drawn from the summary in a worker process
+    with BackgroundRenderer(enabled=visualize) as renderer:
+        renderer.submit(render_inventory_charts, kinds_summary, data_dir)
+
+@lru_cache(maxsize=None)
+def load_osdu_extensions(types_file=os.path.join('data', 'osdu-types.json')):
+    # Load OSDU file types once and keep a set of their extensions for quick lookup
+    with open(types_file, 'r') as f:
         osdu_types = json.load(f)
-    
-    # Create a set of OSDU extensions for quick lookup
-    osdu_extensions = {ext.lower() for filetype in osdu_types['filetypes'] for ext in filetype.get('extension', [])}
-
-    # Convert FileSize to numeric, coercing errors to NaN
-    df['FileSize'] = pd.to_numeric(df['FileSize'], errors='coerce')
-
-    # Print out any rows where FileSize is NaN to debug
-    if df['FileSize'].isnull().any():
-        print("Non-numeric FileSize entries found:")
-        print(df[df['FileSize'].isnull()])
-
-    unknown_count = df['Category'].value_counts().get('Unknown', 0)
-    total_files = len(df)
-
-    # Count total occurrences of each file extension
-    extension_counts = df['FileExtension'].value_counts().to_dict()
-
-    kinds_summary = {
-        'kinds': {},
-        'unknown_count': unknown_count,
-        'total_files': total_files,
-        'total_size': df['FileSize'].sum()
-    }
-
-    for category in df['Category'].unique():
-        if category != 'Unknown':
-            category_df = df[df['Category'] == category]
+    return frozenset(filetype['extension'].lower() for filetype in osdu_types['filetypes'])
+
+# Columns the summary reads
+SUMMARY_COLUMNS = ['FilePath', 'FileExtension', 'FileSize', 'Category']
+
+class SummaryAccumulator:
+    # Builds kinds_summary from one or more DataFrame chunks. Each chunk is
+    # reduced with one grouped aggregation and merged into running totals, so
+    # inventories larger than memory can be summarized chunk by chunk.
+    def __init__(self):
+        self.total_files = 0
+        self.total_size = 0
+        self.unknown_count = 0
+        self.extension_counts = Counter()
+        self.kinds = {}
+
+    def add(self, df):
+        # Convert FileSize to numeric, coercing errors to NaN
+        df['FileSize'] = pd.to_numeric(df['FileSize'], errors='coerce')
+
+        # Print out any rows where FileSize is NaN to debug
+        if df['FileSize'].isnull().any():
+            print("Non-numeric FileSize entries found:")
+            print(df[df['FileSize'].isnull()])
+
+        categories = df['Category'].astype(str)
+        extensions = df['FileExtension'].fillna('').astype(str)
+        self.total_files += len(df)
+        self.total_size += df['FileSize'].sum()
+        self.extension_counts.update(extensions.value_counts().to_dict())
+
+        known = categories != 'Unknown'
+        self.unknown_count += int((~known).sum())
+        if not known.any():
+            return
+
+        frame = pd.DataFrame({
+            'Category': categories[known],
+            'Folder': df['FilePath'][known].astype(str).str.rpartition('/')[0],
+            'FileExtension': extensions[known],
+            'FileSize': df['FileSize'][known],
+        })
+        stats = frame.groupby('Category', sort=False)['FileSize'].agg(['size', 'count', 'sum', 'min', 'max'])
+        folders = frame.drop_duplicates(['Category', 'Folder']).groupby('Category', sort=False)['Folder'].agg(list)
+        filetypes = frame.drop_duplicates(['Category', 'FileExtension']).groupby('Category', sort=False)['FileExtension'].agg(list)
+
+        for category in pd.unique(frame['Category']):
+            row = stats.loc[category]
+            kind = self.kinds.get(category)
+            if kind is None:
+                kind = self.kinds[category] = {'count': 0, 'sized': 0, 'total': 0, 'min': np.nan, 'max': np.nan,
+                                               'folders': {}, 'filetypes': {}}
+            kind['count'] += int(row['size'])
+            kind['sized'] += int(row['count'])
+            kind['total'] += row['sum']
+            kind['min'] = np.fmin(kind['min'], row['min'])
+            kind['max'] = np.fmax(kind['max'], row['max'])
+            # dicts keep first-seen order, like DataFrame.unique()
+            kind['folders'].update(dict.fromkeys(folders[category]))
+            kind['filetypes'].update(dict.fromkeys(filetypes[category]))
+
+    def result(self, osdu_extensions=None):
+        if osdu_extensions is None:
+            osdu_extensions = load_osdu_extensions()
+        kinds_summary = {
+            'kinds': {},
+            'unknown_count': self.unknown_count,
+            'total_files': self.total_files,
+            'total_size': self.total_size
+        }
+        for category, kind in self.kinds.items():
             kinds_summary['kinds'][category] = {
-                'count': len(category_df),
-                'folders': category_df['FilePath'].apply(os.path.dirname).unique().tolist(),
-                'filetypes': [],
+                'count': kind['count'],
+                'folders': list(kind['folders']),
+                'filetypes': [
+                    {
+                        'extension': ext,
+                        'count': self.extension_counts.get(ext, 0),
+                        'in_osdu': ext.lower() in osdu_extensions
+                    }
+                    for ext in kind['filetypes']
+                ],
                 'size_stats': {
-                    'total': category_df['FileSize'].sum(),
-                    'avg': category_df['FileSize'].mean(),
-                    'min': category_df['FileSize'].min(),
-                    'max': category_df['FileSize'].max()
+                    'total': kind['total'],
+                    'avg': kind['total'] / kind['sized'] if kind['sized'] else np.nan,
+                    'min': kind['min'],
+                    'max': kind['max']
                 }
             }
-            
-            for ext in category_df['FileExtension'].unique():
-                filetype_info = {
-                    'extension': ext,
-                    'count': extension_counts.get(ext, 0),
-                    'in_osdu': ext.lower() in osdu_extensions
-                }
-                kinds_summary['kinds'][category]['filetypes'].append(filetype_info)
-
-    return kinds_summary
+        return kinds_summary
 
-def generate_visualizations(df, kinds_summary):
-    print("Generating visualizations...")
-
-    # Check if DataFrame is empty
-    if df.empty:
-        print("DataFrame is empty. No visualizations will be generated.")
-        return
+def generate_summary(df):
+    summary = SummaryAccumulator()
+    summary.add(df)
+    return summary.result()
 
-    # File type distribution
-    plt.figure(figsize=(12, 6))
-    df['Category'].value_counts().plot(kind='bar')
-    plt.title('File Type Distribution')
-    plt.xlabel('Category')
-    plt.ylabel('Count')
-    plt.tight_layout()
-    plt.savefig(os.path.join(data_dir, 'file_type_distribution.png'))
-    plt.close()
-    print("File type distribution saved.")
-
-    # File size statistics
-    plt.figure(figsize=(12, 6))
-    size_stats = pd.DataFrame({k: v['size_stats'] for k, v in kinds_summary['kinds'].items()}).T
-    size_stats['avg'] = size_stats['avg'] / 1024 / 1024  # Convert to MB
-    size_stats['avg'].plot(kind='bar')
-    plt.title('Average File Size by Category')
-    plt.xlabel('Category')
-    plt.ylabel('Average Size (MB)')
-    plt.tight_layout()
-    plt.savefig(os.path.join(data_dir, 'avg_file_size_by_category.png'))
-    plt.close()
-    print("Average file size by category saved.")
+def generate_summary_chunked(input_file, chunk_size=None):
+    # Summarize an enhanced inventory table (Parquet or CSV) without loading it whole
+    summary = SummaryAccumulator()
+    for chunk in iter_inventory_table(input_file, columns=SUMMARY_COLUMNS, batch_size=chunk_size or summary_chunk_size):
+        summary.add(chunk)
+    return summary.result()
 
 def calculate_size_stats(sizes):
     if not sizes:
@@ -447,4 +573,10 @@ def calculate_size_stats(sizes):
     }
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Process the blob inventory")
+    parser.add_argument('--delta', action='store_true', help='Process blob_inventory_volve_delta.ndjson and update the existing outputs')
+    parser.add_argument('--las-headers-only', action='store_true', help='Range-read and parse only the LAS headers, skipping curve data')
+    parser.add_argument('--no-cache', action='store_true', help='Re-download and re-parse every LAS file instead of using the extraction cache')
+    parser.add_argument('--skip-visualizations', action='store_true', help='Do not render the summary charts')
+    args = parser.parse_args()
+    main(args.delta, args.las_headers_only, not args.no_cache, not args.skip_visualizations)
@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import lasio
+import numpy as np
+
+manifests_dir = './data/manifests'
+
+# Curve samples are stored here as .npy arrays, one file per LAS file
+curves_dir = './data/curves'
+
+# Downloads that may be in flight at the same time
+max_concurrent_downloads = 16
+
+# Upper bound on LAS bytes held in memory (downloaded but not yet parsed)
+memory_budget = 512 * 1024 * 1024
+
+# Header-only mode reads this many bytes first and doubles the range until
+# the data section marker is found
+header_read_size = 16 * 1024
+
+# Start of the data section: ~A in LAS 2.0, ~<name>_DATA in LAS 3.0
+DATA_SECTION_PATTERN = re.compile(rb'(?im)^[ \t]*~(a|\w*_data)')
+
+def decode_las(data):
+    # LAS files declare no encoding: UTF-8 is tried first and, as lasio does,
+    # latin-1 otherwise, which decodes any byte without replacement characters
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+def parse_las_bytes(container_name, blob_name, data):
+    # Parse a LAS file straight from its downloaded bytes; runs in a worker process
+    try:
+        las = lasio.read(decode_las(data))
+    except Exception as e:
+        logging.error(f"Error reading LAS file {blob_name}: {str(e)}")
+        return None
+
+    well_data = {
+        'filename': blob_name,
+        'well': las.well.get('WELL', {}).value or 'NA',
+        'company': las.well.get('COMP', {}).value or 'NA',
+        'field': las.well.get('FLD', {}).value or 'NA',
+        'country': las.well.get('CTRY', {}).value or 'NA',
+        'start_depth': las.well.get('STRT', {}).value,
+        'stop_depth': las.well.get('STOP', {}).value,
+        'step': las.well.get('STEP', {}).value,
+        'null_value': las.well.get('NULL', {}).value,
+        'curve_names': [curve.mnemonic for curve in las.curves],
+        'curve_units': [curve.unit for curve in las.curves],
+        'curve_descriptions': [curve.descr for curve in las.curves],
+        'curve_store': write_curve_store(container_name, blob_name, las.curves)
+    }
+
+    write_well_json(well_data)
+    return well_data
+
+def parse_las_header(blob_name, data):
+    # Parse only the version, well and curve sections of a LAS header
+    try:
+        las = lasio.read(decode_las(data), ignore_data=True)
+    except Exception as e:
+        logging.error(f"Error reading LAS header {blob_name}: {str(e)}")
+        return None
+
+    return {
+        'filename': blob_name,
+        'well': las.well.get('WELL', {}).value or 'NA',
+        'company': las.well.get('COMP', {}).value or 'NA',
+        'field': las.well.get('FLD', {}).value or 'NA',
+        'country': las.well.get('CTRY', {}).value or 'NA',
+        'start_depth': las.well.get('STRT', {}).value,
+        'stop_depth': las.well.get('STOP', {}).value,
+        'step': las.well.get('STEP', {}).value,
+        'null_value': las.well.get('NULL', {}).value,
+        'curve_names': [curve.mnemonic for curve in las.curves],
+        'curve_units': [curve.unit for curve in las.curves],
+        'curve_descriptions': [curve.descr for curve in las.curves],
+        'curve_store': None
+    }
+
+async def read_las_header(blob_client, size=None, read_size=header_read_size):
+    # Range-read the start of a LAS blob, fetching more only when the header
+    # runs past what has been read. Returns the bytes before the data section.
+    data = b''
+    length = read_size
+    while True:
+        downloader = await blob_client.download_blob(offset=len(data), length=length)
+        chunk = await downloader.readall()
+        data += chunk
+        match = DATA_SECTION_PATTERN.search(data)
+        if match:
+            return data[:match.start()]
+        if not chunk or len(chunk) < length or (size is not None and len(data) >= size):
+            return data
+        length *= 2
+
+def curve_store_name(container_name, blob_name):
+    # The file's readable stem plus a hash of (container, blob name): blob
+    # names that differ only in characters the stem replaces, or the same
+    # name in two containers, must not share curve files
+    stem = re.sub(r'[^\w\-\.]', '_', os.path.splitext(blob_name.rpartition('/')[2])[0])
+    digest = hashlib.sha1(f"{container_name}\0{blob_name}".encode('utf-8')).hexdigest()[:16]
+    return f"{stem}-{digest}"
+
+def write_curve_store(container_name, blob_name, curves):
+    # Numeric curves go into one (samples x curves) float64 .npy file; curves
+    # that are not numeric go into a second .npy of fixed-width strings. Both
+    # can be opened with np.load(mmap_mode='r') without reading them whole.
+    os.makedirs(curves_dir, exist_ok=True)
+    base_name = curve_store_name(container_name, blob_name)
+
+    numeric, text = [], []
+    for curve in curves:
+        data = np.asarray(curve.data)
+        if data.dtype.kind in 'biuf':
+            numeric.append((curve.mnemonic, data.astype(np.float64, copy=False)))
+        else:
+            text.append((curve.mnemonic, data.astype(str)))
+
+    store = {'path': None, 'columns': [], 'samples': 0, 'text_path': None, 'text_columns': []}
+    if numeric:
+        array = np.column_stack([data for _, data in numeric])
+        store['path'] = os.path.join(curves_dir, base_name + '.npy')
+        store['columns'] = [mnemonic for mnemonic, _ in numeric]
+        store['samples'] = int(array.shape[0])
+        np.save(store['path'], array)
+    if text:
+        array = np.column_stack([data for _, data in text])
+        store['text_path'] = os.path.join(curves_dir, base_name + '.text.npy')
+        store['text_columns'] = [mnemonic for mnemonic, _ in text]
+        store['samples'] = int(array.shape[0])
+        np.save(store['text_path'], array)
+    return store
+
+def load_curves(well_data, mmap=True):
+    # Returns {mnemonic: 1-D array}; with mmap the arrays are lazy views of the files
+    store = well_data['curve_store']
+    mode = 'r' if mmap else None
+    curves = {}
+    for path_key, columns_key in (('path', 'columns'), ('text_path', 'text_columns')):
+        if store.get(path_key):
+            array = np.load(store[path_key], mmap_mode=mode)
+            for i, mnemonic in enumerate(store[columns_key]):
+                curves[mnemonic] = array[:, i]
+    return curves
+
+def write_well_json(well_data):
+    # Create the manifests directory if it doesn't exist
+    os.makedirs(manifests_dir, exist_ok=True)
+
+    json_filename = f"well-log-{well_data['well']}-{well_data['company']}"
+    json_filename = re.sub(r'[^\w\-_\.]', '_', json_filename)  # Replace invalid characters with underscore
+    json_filename = f"{json_filename}.json"
+    json_filepath = os.path.join(manifests_dir, json_filename)
+
+    # Write the well data to a JSON file
+    with open(json_filepath, 'w') as json_file:
+        json.dump(well_data, json_file, indent=2)
+
+    logging.info(f"Well data written to {json_filepath}")
+    return json_filepath
+
+class ByteBudget:
+    # Async counting limit on bytes. A request larger than the whole budget is
+    # still let through once nothing else is in flight, so big files cannot stall.
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, size):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_use == 0 or self.in_use + size <= self.limit)
+            self.in_use += size
+
+    async def release(self, size):
+        async with self._condition:
+            self.in_use -= size
+            self._condition.notify_all()
+
+def take_cached(cache, container_name, blobs, on_result, header_only=False):
+    # Answers the blobs whose etag the cache holds a parse for through
+    # on_result(blob_name, well_data) and returns the ones still to download.
+    # A full parse can also answer a header-only lookup.
+    kinds = ('las-header', 'las') if header_only else ('las',)
+    pending = []
+    for blob in blobs:
+        blob_name, _, etag = blob
+        well_data = cache.get(container_name, blob_name, etag, kinds)
+        if well_data is None:
+            pending.append(blob)
+        else:
+            on_result(blob_name, well_data)
+    return pending
+
+async def extract_las_files(container_client, blobs, on_result, executor, max_concurrency=max_concurrent_downloads, budget_bytes=memory_budget, header_only=False, cache=None):
+    # blobs: iterable of (blob_name, size, etag). A fixed set of workers downloads
+    # into memory through the shared client and hands the bytes to the process
+    # pool for parsing. Bytes are counted against the budget from the start of
+    # the download until parsing finishes. With header_only, only the header is
+    # range-read and parsed in place; no curve data is downloaded. With a cache,
+    # every parse is stored in it; blobs it already answers are taken out
+    # beforehand with take_cached.
+    loop = asyncio.get_running_loop()
+    budget = ByteBudget(budget_bytes)
+    container_name = container_client.container_name
+    queue = asyncio.Queue(maxsize=max_concurrency * 2)
+
+    async def producer():
+        for blob in blobs:
+            await queue.put(blob)
+        for _ in range(max_concurrency):
+            await queue.put(None)
+
+    async def worker():
+        while True:
+            blob = await queue.get()
+            if blob is None:
+                return
+            blob_name, size, etag = blob
+            blob_client = container_client.get_blob_client(blob_name)
+            if header_only:
+                try:
+                    header = await read_las_header(blob_client, size)
+                    well_data = parse_las_header(blob_name, header)
+                    if well_data:
+                        write_well_json(well_data)
+                        if cache is not None:
+                            cache.put(container_name, blob_name, etag, well_data, 'las-header')
+                    on_result(blob_name, well_data)
+                except Exception as e:
+                    logging.error(f"Error processing {blob_name}: {str(e)}")
+                    on_result(blob_name, None)
+                continue
+
+            # A blob of unknown size reserves the whole budget, so it is only
+            # downloaded once nothing else is held
+            size = int(size) if size is not None else budget.limit
+            await budget.acquire(size)
+            try:
+                downloader = await blob_client.download_blob()
+                data = await downloader.readall()
+                well_data = await loop.run_in_executor(executor, parse_las_bytes, container_name, blob_name, data)
+                del data
+                if well_data and cache is not None:
+                    cache.put(container_name, blob_name, etag, well_data, 'las')
+                on_result(blob_name, well_data)
+            except Exception as e:
+                logging.error(f"Error processing {blob_name}: {str(e)}")
+                on_result(blob_name, None)
+            finally:
+                await budget.release(size)
+
+    await asyncio.gather(producer(), *(worker() for _ in range(max_concurrency)))
+
+async def extract_las_container(blob_service_client, container_name, blobs, on_result, max_concurrency=max_concurrent_downloads, budget_bytes=memory_budget, max_workers=None, header_only=False, cache=None):
+    async with blob_service_client:
+        container_client = blob_service_client.get_container_client(container_name)
+        if header_only:
+            await extract_las_files(container_client, blobs, on_result, None, max_concurrency, budget_bytes, header_only=True, cache=cache)
+            return
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            await extract_las_files(container_client, blobs, on_result, executor, max_concurrency, budget_bytes, cache=cache)
@@ -2,10 +2,20 @@ import logging
 from logging.handlers import RotatingFileHandler
 import os
 
+class LazyRotatingFileHandler(RotatingFileHandler):
+    # Opens the log file, and creates its directory, on the first record
+    # instead of when the module is imported
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
 def setup_logger(name, log_file, level=logging.INFO):
     formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
 
-    handler = RotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=5)
+    handler = LazyRotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=5)
     handler.setFormatter(formatter)
 
     logger = logging.getLogger(name)
@@ -14,10 +24,6 @@ def setup_logger(name, log_file, level=logging.INFO):
 
     return logger
 
-# Create logs directory if it doesn't exist
-if not os.path.exists('logs'):
-    os.makedirs('logs')
-
 # Setup loggers
 main_logger = setup_logger('main', 'logs/main.log')
 ingestion_logger = setup_logger('ingestion', 'logs/ingestion.log')
@@ -7,12 +7,15 @@ def main():
     parser = argparse.ArgumentParser(description="ADME Ingestion Pipeline")
     parser.add_argument('--dry-run', action='store_true', help='Run in dry run mode (no actual ingestion)')
     parser.add_argument('--config', default='config.json', help='Path to configuration file')
+    parser.add_argument('--skip-visualizations', action='store_true', help='Do not render the summary charts')
     args = parser.parse_args()
 
     with open(args.config, 'r') as f:
         config = json.load(f)
 
     config['dry_run'] = args.dry_run
+    if args.skip_visualizations:
+        config['skip_visualizations'] = True
 
     asyncio.run(run_pipeline(config, args.dry_run))
 
@@ -0,0 +1,146 @@
+import argparse
+import csv
+import json
+import os
+from json.encoder import encode_basestring_ascii
+from inventory_store import find_inventory_table, atomic_output
+from manifest_builders import load_manifest_builders, load_manifest_assembler, builder_for
+from generate_manifests import iter_ready_batches, manifest_batch_size
+
+data_dir = 'data'
+
+# Limits for one combined manifest: serialized size and number of file records
+max_manifest_bytes = 1024 * 1024
+max_manifest_records = 500
+
+# Groups collecting records at the same time; past this the oldest is written
+# out early so memory stays bounded however many wells and folders there are
+max_open_batches = 10000
+
+def group_key(well_id, survey_name, file_path):
+    # Files of one well, else of one survey, else of one folder travel together
+    if well_id:
+        return 'well:' + well_id
+    if survey_name:
+        return 'survey:' + survey_name
+    return 'folder:' + file_path.rpartition('/')[0]
+
+class OpenBatch:
+    __slots__ = ('group', 'records', 'file_paths', 'size')
+
+    def __init__(self, group, base_size):
+        self.group = group
+        self.records = {}
+        self.file_paths = []
+        self.size = base_size
+
+class ManifestBatcher:
+    # Packs file records into combined manifests per group. A manifest is
+    # written once adding the next record would exceed max_bytes or it holds
+    # max_records; a single record larger than max_bytes gets a manifest of its
+    # own. Every written file is mapped to the ID of the manifest carrying it.
+    def __init__(self, output, file_map, max_bytes=max_manifest_bytes, max_records=max_manifest_records, max_open=max_open_batches):
+        self.output = output
+        self.file_map = file_map
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.max_open = max_open
+        self.assembler = load_manifest_assembler()
+        self.open = {}
+        self.manifests = 0
+        self.files = 0
+
+    def add(self, group, file_path, section, record_text):
+        batch = self.open.get(group)
+        added = len(record_text) + 1
+        if batch is not None and (batch.size + added > self.max_bytes or len(batch.file_paths) >= self.max_records):
+            self.flush(group)
+            batch = None
+        if batch is None:
+            if len(self.open) >= self.max_open:
+                self.flush(next(iter(self.open)))
+            batch = self.open[group] = OpenBatch(group, self.assembler.base_size)
+        batch.records.setdefault(section, []).append(record_text)
+        batch.file_paths.append(file_path)
+        batch.size += added
+
+    def flush(self, group):
+        batch = self.open.pop(group)
+        self.manifests += 1
+        self.files += len(batch.file_paths)
+        manifest_id = f"manifest-{self.manifests:07d}"
+        self.output.write('{"ManifestID":' + encode_basestring_ascii(manifest_id) +
+                          ',"GroupKey":' + encode_basestring_ascii(group) +
+                          ',"FilePaths":' + json.dumps(batch.file_paths, separators=(',', ':')) +
+                          ',"manifest":' + self.assembler.text(batch.records) + '}\n')
+        self.file_map.writerows((file_path, manifest_id) for file_path in batch.file_paths)
+
+    def close(self):
+        while self.open:
+            self.flush(next(iter(self.open)))
+
+def batch_manifests(input_file=None, output_file=None, map_file=None, max_bytes=max_manifest_bytes, max_records=max_manifest_records, batch_size=manifest_batch_size):
+    # Stream the ready rows of the enhanced inventory into combined manifests,
+    # one {"ManifestID", "GroupKey", "FilePaths", "manifest"} line each, and
+    # write FilePath -> ManifestID to map_file. Files whose category has no
+    # record section are mapped to an empty ManifestID.
+    input_file = input_file or find_inventory_table('blob_inventory_enhanced', data_dir)
+    output_file = output_file or os.path.join(data_dir, 'generated_manifest_batches.ndjson')
+    map_file = map_file or os.path.join(data_dir, 'manifest_file_map.csv')
+    builders = load_manifest_builders()
+    unbatched = 0
+
+    with atomic_output(output_file) as temp_output, atomic_output(map_file) as temp_map:
+        with open(temp_output, 'w', encoding='utf-8') as output, open(temp_map, 'w', newline='', encoding='utf-8') as map_output:
+            file_map = csv.writer(map_output)
+            file_map.writerow(['FilePath', 'ManifestID'])
+            batcher = ManifestBatcher(output, file_map, max_bytes, max_records)
+            for columns in iter_ready_batches(input_file, batch_size):
+                names = list(columns)
+                category_index = names.index('Category')
+                path_index = names.index('FilePath')
+                well_index = names.index('WellID')
+                survey_index = names.index('SurveyName')
+                compiled = {}
+                for row in zip(*columns.values()):
+                    category = row[category_index]
+                    if category not in compiled:
+                        builder = builder_for(category, builders)
+                        compiled[category] = (builder.section, builder.compile_record(names) if builder.section else None)
+                    section, record_text = compiled[category]
+                    if section is None:
+                        file_map.writerow((row[path_index], ''))
+                        unbatched += 1
+                        continue
+                    batcher.add(group_key(row[well_index], row[survey_index], row[path_index]),
+                                row[path_index], section, record_text(row))
+            batcher.close()
+
+    print(f"{batcher.files} files packed into {batcher.manifests} manifests in {output_file} "
+          f"({unbatched} files without a manifest record); file map written to {map_file}")
+    return batcher.manifests
+
+def iter_manifest_batches(path):
+    # Yields (manifest ID, file paths, manifest) from a combined manifest file
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record['ManifestID'], record['FilePaths'], record['manifest']
+
+def is_batch_file(path):
+    # True when the first line of an NDJSON manifest file is a combined manifest
+    if not path.lower().endswith(('.ndjson', '.jsonl')):
+        return False
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                return 'ManifestID' in json.loads(line)
+    return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack ready inventory rows into combined manifests")
+    parser.add_argument('--max-bytes', type=int, default=max_manifest_bytes, help='Maximum serialized size of one manifest')
+    parser.add_argument('--max-records', type=int, default=max_manifest_records, help='Maximum files carried by one manifest')
+    args = parser.parse_args()
+    batch_manifests(max_bytes=args.max_bytes, max_records=args.max_records)
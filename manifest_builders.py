@@ -0,0 +1,128 @@
+import copy
+import json
+import os
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
+
+# The manifest skeleton every builder starts from
+manifest_template_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'manifest-template.json')
+
+# Where each category's record goes in the template and which inventory
+# columns it carries, as {record key: inventory column}. Covers every
+# category json_to_csv.get_file_category_and_schema can emit; a category
+# missing here gets the Unknown builder, which has no record section: no
+# manifest is generated for its files. json_to_csv fills WellID only for
+# Well Logs and SurveyName only for Seismic Data, so only those map them.
+# Adding a category is one entry.
+MANIFEST_FIELD_MAPPINGS = {
+    'Well Logs': ('MasterData', {'WellID': 'WellID', 'FileName': 'FileName', 'FilePath': 'FilePath'}),
+    'Seismic Data': ('Data.Datasets', {'SurveyName': 'SurveyName', 'FileName': 'FileName', 'FilePath': 'FilePath'}),
+    'Real-Time Drilling Data': ('Data.WorkProductComponents', {'FileName': 'FileName', 'FilePath': 'FilePath'}),
+    'Production Data': ('Data.WorkProductComponents', {'Date': 'Date', 'FileName': 'FileName', 'FilePath': 'FilePath'}),
+    'Reservoir Models': ('Data.WorkProductComponents', {'FileName': 'FileName', 'FilePath': 'FilePath'}),
+    'Documents': ('Data.Datasets', {'FileName': 'FileName', 'FilePath': 'FilePath'}),
+    'Geophysical Interpretation': ('Data.WorkProductComponents', {'FileName': 'FileName', 'FilePath': 'FilePath'}),
+    'Wellbore Data': ('MasterData', {'FileName': 'FileName', 'FilePath': 'FilePath'}),
+    'Markers and Horizons': ('Data.WorkProductComponents', {'FileName': 'FileName', 'FilePath': 'FilePath'}),
+    'Unknown': (None, {}),
+}
+
+# Stands in for the record while the template is serialized
+RECORD_PLACEHOLDER = '__manifest_record__'
+
+def section_list(manifest, section):
+    target = manifest
+    for key in section.split('.'):
+        target = target[key]
+    return target
+
+class ManifestBuilder:
+    # Compiled once per category: the template is serialized with a
+    # placeholder where the record goes, and the record's key fragments are
+    # precomputed, so a row only costs encoding its own values.
+    def __init__(self, category, template, section, fields):
+        self.category = category
+        self.template = template
+        self.section = section
+        self.fields = dict(fields)
+
+        if section is None:
+            self.head = json.dumps(template, separators=(',', ':'))
+            self.tail = ''
+        else:
+            skeleton = copy.deepcopy(template)
+            section_list(skeleton, section).append(RECORD_PLACEHOLDER)
+            self.head, self.tail = json.dumps(skeleton, separators=(',', ':')).split(json.dumps(RECORD_PLACEHOLDER))
+        self.keys = [encode_basestring_ascii(key) + ':' for key in self.fields]
+
+    def record(self, row):
+        return {key: row[column] for key, column in self.fields.items()}
+
+    def build(self, row):
+        manifest = copy.deepcopy(self.template)
+        if self.section is not None:
+            section_list(manifest, self.section).append(self.record(row))
+        return manifest
+
+    def compile_record(self, names):
+        # Returns record_text(row) giving the record JSON for a row tuple laid out as names
+        parts = [(key, names.index(column)) for key, column in zip(self.keys, self.fields.values())]
+        def record_text(row):
+            return '{' + ','.join([key + encode_basestring_ascii(row[i]) for key, i in parts]) + '}'
+        return record_text
+
+    def compile_text(self, names):
+        # Returns text(row) giving the manifest JSON for a row tuple laid out as names
+        head, tail = self.head, self.tail
+        if self.section is None:
+            return lambda row: head
+        record_text = self.compile_record(names)
+        def text(row):
+            return head + record_text(row) + tail
+        return text
+
+class ManifestAssembler:
+    # The template serialized once with a placeholder in each record section,
+    # so a combined manifest is the record texts joined into the gaps
+    def __init__(self, template, sections):
+        skeleton = copy.deepcopy(template)
+        markers = {}
+        for i, section in enumerate(sections):
+            markers[section] = json.dumps(f"{RECORD_PLACEHOLDER}{i}")
+            section_list(skeleton, section).append(f"{RECORD_PLACEHOLDER}{i}")
+        text = json.dumps(skeleton, separators=(',', ':'))
+        self.sections = sorted(sections, key=lambda section: text.index(markers[section]))
+        self.pieces = []
+        for section in self.sections:
+            head, text = text.split(markers[section])
+            self.pieces.append(head)
+        self.pieces.append(text)
+        # Length of the manifest with no records
+        self.base_size = sum(len(piece) for piece in self.pieces)
+
+    def text(self, records):
+        # records: {section: [record text, ...]}
+        parts = [self.pieces[0]]
+        for section, piece in zip(self.sections, self.pieces[1:]):
+            parts.append(','.join(records.get(section, ())))
+            parts.append(piece)
+        return ''.join(parts)
+
+@lru_cache(maxsize=None)
+def load_manifest_builders(template_file=manifest_template_file):
+    with open(template_file, 'r') as f:
+        template = json.load(f)
+    return {category: ManifestBuilder(category, template, section, fields)
+            for category, (section, fields) in MANIFEST_FIELD_MAPPINGS.items()}
+
+def builder_for(category, builders=None):
+    builders = builders or load_manifest_builders()
+    return builders.get(category) or builders['Unknown']
+
+
+@lru_cache(maxsize=None)
+def load_manifest_assembler(template_file=manifest_template_file):
+    with open(template_file, 'r') as f:
+        template = json.load(f)
+    sections = sorted({section for section, _ in MANIFEST_FIELD_MAPPINGS.values() if section is not None})
+    return ManifestAssembler(template, sections)
@@ -1,86 +1,161 @@
-import pandas as pd
+import argparse
 import json
 import os
-from collections import defaultdict
-import matplotlib.pyplot as plt
+from inventory_store import find_inventory_table, read_inventory_table
+from manifest_kind_index import ManifestLibrary
+from visualizations import BackgroundRenderer, render_coverage_chart
+
+# The only columns the coverage assessment reads
+COVERAGE_COLUMNS = ['FileName', 'FileExtension', 'Category', 'OSDUSchema']
+
+# Uncovered file names kept per category as examples for the report
+missing_sample_size = 5
+
+# Rows assessed per chunk when the inventory is read from a table file
+coverage_chunk_size = 1000000
 
 def load_enhanced_inventory(file_path):
-    return pd.read_csv(file_path)
+    return read_inventory_table(file_path, columns=COVERAGE_COLUMNS)
 
 def load_osdu_manifests(manifests_dir):
-    manifests = {}
-    for filename in os.listdir(manifests_dir):
-        if filename.endswith('.json'):
-            with open(os.path.join(manifests_dir, filename), 'r') as f:
-                manifest = json.load(f)
-                kind = manifest.get('kind')
-                if kind:
-                    manifests[kind] = manifest
-                else:
-                    print(f"Warning: Manifest in {filename} does not have a 'kind' field.")
-    return manifests
-
-def assess_manifest_coverage(inventory_df, manifests):
-    coverage = defaultdict(lambda: {'covered': 0, 'total': 0, 'missing': [], 'file_types': set()})
-    
-    for _, row in inventory_df.iterrows():
-        category = row['Category']
-        osdu_schema = row['OSDUSchema']
-        file_extension = os.path.splitext(row['FileName'])[1].lower()
-        coverage[category]['total'] += 1
-        coverage[category]['file_types'].add(file_extension)
-        
-        if osdu_schema in manifests:
-            coverage[category]['covered'] += 1
+    # The version-aware library, from the persistent kind index; only new or
+    # changed files are scanned and manifests are read on lookup
+    return ManifestLibrary(manifests_dir)
+
+def manifest_kinds(manifests):
+    # The kinds a coverage check matches OSDUSchema against. Accepts the
+    # library of load_osdu_manifests (matched version-aware), a manifests
+    # directory, a JSON file of kinds or schema entries, or any iterable of kinds.
+    if isinstance(manifests, ManifestLibrary):
+        return manifests
+    if isinstance(manifests, str):
+        if os.path.isdir(manifests):
+            return load_osdu_manifests(manifests)
+        with open(manifests, 'r') as f:
+            manifests = json.load(f)
+    if isinstance(manifests, dict):
+        return frozenset(manifests)
+    kinds = set()
+    for entry in manifests:
+        if isinstance(entry, dict):
+            entry = entry.get('kind') or entry.get('schema')
+        if entry:
+            kinds.add(entry)
+    return frozenset(kinds)
+
+class CoverageAccumulator:
+    # Per-category covered/total counts, extension sets and a capped sample of
+    # uncovered file names, merged over inventory chunks. Every step is a
+    # grouped column operation; only the sampled names become Python objects.
+    def __init__(self, manifests, sample_size=missing_sample_size):
+        self.kinds = manifest_kinds(manifests)
+        self.sample_size = sample_size
+        self.coverage = {}
+        self._matched = {}
+
+    def add(self, df):
+        import pandas as pd
+        if 'FileExtension' in df:
+            extensions = df['FileExtension']
         else:
-            coverage[category]['missing'].append(row['FileName'])
-    
-    return coverage
+            from json_to_csv import EXTENSION_PATTERN
+            extensions = df['FileName'].astype(str).str.extract(EXTENSION_PATTERN, expand=False).fillna('').str.lower()
+        # Each distinct schema is looked up once, however many rows carry it
+        for schema in df['OSDUSchema'].dropna().unique().tolist():
+            if schema not in self._matched:
+                self._matched[schema] = schema in self.kinds
+        covered = df['OSDUSchema'].isin([schema for schema, matched in self._matched.items() if matched])
+        frame = pd.DataFrame({'Category': df['Category'], 'FileExtension': extensions, 'covered': covered})
+
+        counts = frame.groupby('Category', observed=True, sort=False)['covered'].agg(['size', 'sum'])
+        for category, (total, covered_count) in counts.iterrows():
+            data = self.coverage.get(category)
+            if data is None:
+                data = self.coverage[category] = {'covered': 0, 'total': 0, 'missing': [], 'missing_count': 0, 'file_types': set()}
+            data['total'] += int(total)
+            data['covered'] += int(covered_count)
+            data['missing_count'] += int(total) - int(covered_count)
+
+        pairs = frame[['Category', 'FileExtension']].drop_duplicates()
+        for category, extension in zip(pairs['Category'].tolist(), pairs['FileExtension'].tolist()):
+            self.coverage[category]['file_types'].add('' if pd.isna(extension) else str(extension))
+
+        missing = pd.DataFrame({'Category': df['Category'], 'FileName': df['FileName']})[~covered.to_numpy()]
+        samples = missing.groupby('Category', observed=True, sort=False).head(self.sample_size)
+        for category, name in zip(samples['Category'].tolist(), samples['FileName'].tolist()):
+            data = self.coverage[category]
+            if len(data['missing']) < self.sample_size:
+                data['missing'].append(name)
+
+    def result(self):
+        return self.coverage
+
+def assess_manifest_coverage(inventory, manifests, sample_size=missing_sample_size):
+    # inventory: an enhanced inventory DataFrame, or the path of the table,
+    # which is then read in chunks of coverage_chunk_size rows
+    accumulator = CoverageAccumulator(manifests, sample_size)
+    if isinstance(inventory, str):
+        from inventory_store import iter_inventory_table
+        import pandas as pd
+        available = pd.read_csv(inventory, nrows=0).columns if inventory.lower().endswith('.csv') else None
+        columns = [column for column in COVERAGE_COLUMNS if available is None or column in available]
+        for chunk in iter_inventory_table(inventory, columns=columns, batch_size=coverage_chunk_size):
+            accumulator.add(chunk)
+    else:
+        accumulator.add(inventory)
+    return accumulator.result()
+
+def generate_coverage_report(inventory=None, manifests=None, output_file=None, sample_size=missing_sample_size, coverage=None):
+    # generate_coverage_report(df_or_table_path, manifests) assesses and reports;
+    # generate_coverage_report(coverage=coverage) reports an already assessed
+    # coverage dict. The report text is returned and, with output_file, also
+    # written there. At most sample_size missing files are named per category.
+    if coverage is None:
+        if inventory is None or manifests is None:
+            raise ValueError("generate_coverage_report needs an inventory and manifests, or coverage=")
+        coverage = assess_manifest_coverage(inventory, manifests, sample_size)
+    elif inventory is not None or manifests is not None:
+        raise ValueError("generate_coverage_report takes either an inventory and manifests or coverage=, not both")
 
-def generate_coverage_report(coverage):
     report = []
     for category, data in coverage.items():
         covered = data['covered']
         total = data['total']
         percentage = (covered / total) * 100 if total > 0 else 0
         file_types = ', '.join(sorted(data['file_types']))
+        missing_count = data.get('missing_count', len(data['missing']))
         report.append(f"{category}:\n"
                       f"  Total files: {total}\n"
                       f"  Covered by manifests: {covered}\n"
                       f"  Coverage percentage: {percentage:.2f}%\n"
                       f"  File types: {file_types}\n"
-                      f"  Missing manifests for: {', '.join(data['missing'][:5])}"
-                      f"{' ...' if len(data['missing']) > 5 else ''}\n")
-    return '\n'.join(report)
+                      f"  Missing manifests for: {', '.join(data['missing'][:sample_size])}"
+                      f"{' ...' if missing_count > sample_size else ''}\n")
+    report = '\n'.join(report)
+
+    if output_file:
+        with open(output_file, 'w') as f:
+            f.write(report)
+    return report
 
-def main():
-    inventory_file = './data/blob_inventory_enhanced.csv'
+def main(visualize=True):
+    inventory_file = find_inventory_table('blob_inventory_enhanced', './data')
     manifests_dir = './data/osdu_manifests'
     output_file = './data/manifest_coverage_report.txt'
     
-    inventory_df = load_enhanced_inventory(inventory_file)
     manifests = load_osdu_manifests(manifests_dir)
-    coverage = assess_manifest_coverage(inventory_df, manifests)
-    report = generate_coverage_report(coverage)
-    
-    with open(output_file, 'w') as f:
-        f.write(report)
+    coverage = assess_manifest_coverage(inventory_file, manifests)
+    generate_coverage_report(coverage=coverage, output_file=output_file)
     
     print(f"Manifest coverage report has been written to {output_file}")
     
-    # Generate visualization
-    categories = list(coverage.keys())
-    percentages = [(data['covered'] / data['total']) * 100 if data['total'] > 0 else 0 for data in coverage.values()]
-    
-    plt.figure(figsize=(12, 6))
-    plt.bar(categories, percentages)
-    plt.title('Manifest Coverage by Category')
-    plt.xlabel('Category')
-    plt.ylabel('Coverage Percentage')
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    plt.savefig('./data/manifest_coverage_visualization.png')
-    print("Manifest coverage visualization has been saved to ./data/manifest_coverage_visualization.png")
+    # Generate visualization from the per-category percentages in a worker process
+    percentages = {category: (data['covered'] / data['total']) * 100 if data['total'] > 0 else 0 for category, data in coverage.items()}
+    with BackgroundRenderer(enabled=visualize) as renderer:
+        renderer.submit(render_coverage_chart, percentages, './data/manifest_coverage_visualization.png')
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Assess OSDU manifest coverage of the enhanced inventory")
+    parser.add_argument('--skip-visualizations', action='store_true', help='Do not render the coverage chart')
+    args = parser.parse_args()
+    main(not args.skip_visualizations)
@@ -0,0 +1,225 @@
+import json
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+data_dir = 'data'
+default_manifests_dir = os.path.join(data_dir, 'osdu_manifests')
+default_index_file = os.path.join(data_dir, 'osdu_manifests_index.sqlite')
+
+# Fewer new or changed files than this are scanned in-process
+parallel_min_files = 256
+
+# Files handed to one worker task
+scan_chunk_size = 64
+
+# Characters of a manifest file read to look for its kind before it is read whole
+scan_prefix_size = 64 * 1024
+
+# A JSON string or a bracket, enough to follow nesting without parsing values
+JSON_TOKEN_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]]')
+KEY_SEPARATOR_PATTERN = re.compile(r'\s*:\s*')
+
+# The trailing major[.minor[.patch]] of a kind such as osdu:wks:master-data--Well:1.0.0
+KIND_VERSION_PATTERN = re.compile(r'^(.*):(\d+(?:\.\d+)*)$')
+
+def parse_kind(kind):
+    # (kind without version, version tuple or None)
+    match = KIND_VERSION_PATTERN.match(kind)
+    if match is None:
+        return kind, None
+    return match.group(1), tuple(int(part) for part in match.group(2).split('.'))
+
+def compatible(version, requested):
+    # Same major version and at least the requested minor/patch
+    if requested is None:
+        return True
+    if version is None:
+        return False
+    return version[0] == requested[0] and version >= requested
+
+def walk_kind(text):
+    # (found, kind) from the JSON tokens of text, which may be cut short.
+    # found is False when text ends, or a string in it is cut, before the
+    # top-level "kind" or the end of the top-level object.
+    depth = 0
+    position = 0
+    for match in JSON_TOKEN_PATTERN.finditer(text):
+        if '"' in text[position:match.start()]:
+            # Every string is a token, so a quote between tokens opens one
+            # that the text cut off
+            break
+        position = match.end()
+        token = match.group()
+        if token in ('{', '['):
+            depth += 1
+        elif token in ('}', ']'):
+            depth -= 1
+            if depth == 0:
+                return True, None
+        elif depth == 1 and token == '"kind"':
+            separator = KEY_SEPARATOR_PATTERN.match(text, match.end())
+            if separator is None:
+                continue
+            value = JSON_TOKEN_PATTERN.match(text, separator.end())
+            if value is None or not value.group().startswith('"'):
+                break
+            return True, json.loads(value.group())
+    return False, None
+
+def scan_kind(path, prefix_size=scan_prefix_size):
+    # The top-level "kind" of a manifest file. Only the first prefix_size
+    # characters are read and walked, since the key usually turns up within
+    # the first few hundred bytes; otherwise the file is read and parsed in full.
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read(prefix_size)
+        found, kind = walk_kind(text)
+        if found:
+            return kind
+        text += f.read()
+    manifest = json.loads(text)
+    kind = manifest.get('kind') if isinstance(manifest, dict) else None
+    return kind if isinstance(kind, str) else None
+
+def scan_kinds(paths):
+    # (path, kind, error) for each file; worker entry point
+    results = []
+    for path in paths:
+        try:
+            results.append((path, scan_kind(path), None))
+        except (OSError, ValueError) as e:
+            results.append((path, None, str(e)))
+    return results
+
+# Persistent index of kind -> manifest files for a manifest library directory.
+# Each file is recorded with its mtime and size; a refresh scans only files
+# that are new or changed since and drops files that are gone.
+class ManifestKindIndex:
+    def __init__(self, manifests_dir=default_manifests_dir, path=default_index_file):
+        self.manifests_dir = manifests_dir
+        self.directory_key = os.path.abspath(manifests_dir)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                directory TEXT NOT NULL,
+                name TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                kind TEXT,
+                PRIMARY KEY (directory, name)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def refresh(self, max_workers=None):
+        # Bring the index in line with the directory. Returns the number of
+        # files scanned and removed.
+        known = {name: (mtime_ns, size) for name, mtime_ns, size in self.conn.execute(
+            "SELECT name, mtime_ns, size FROM files WHERE directory = ?", (self.directory_key,))}
+        present = {}
+        with os.scandir(self.manifests_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json') and entry.is_file():
+                    stat = entry.stat()
+                    present[entry.name] = (stat.st_mtime_ns, stat.st_size)
+
+        changed = [name for name, identity in present.items() if known.get(name) != identity]
+        removed = [name for name in known if name not in present]
+        paths = [os.path.join(self.manifests_dir, name) for name in changed]
+        if len(paths) < parallel_min_files or max_workers == 1:
+            results = scan_kinds(paths)
+        else:
+            chunks = [paths[i:i + scan_chunk_size] for i in range(0, len(paths), scan_chunk_size)]
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = [result for chunk in executor.map(scan_kinds, chunks) for result in chunk]
+
+        rows = []
+        for path, kind, error in results:
+            name = os.path.basename(path)
+            if error:
+                print(f"Warning: Manifest in {name} could not be read: {error}")
+            elif not kind:
+                print(f"Warning: Manifest in {name} does not have a 'kind' field.")
+            rows.append((self.directory_key, name) + present[name] + (kind,))
+        self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", rows)
+        self.conn.executemany("DELETE FROM files WHERE directory = ? AND name = ?",
+                              [(self.directory_key, name) for name in removed])
+        self.conn.commit()
+        return len(changed), len(removed)
+
+    def entries(self):
+        # (kind, file name, mtime_ns) of every indexed file that has a kind
+        return self.conn.execute(
+            "SELECT kind, name, mtime_ns FROM files WHERE directory = ? AND kind IS NOT NULL",
+            (self.directory_key,)).fetchall()
+
+# Read-only view of a manifest library, backed by the kind index. Lookups
+# (resolve, files_for, manifest, in) are version-aware: a kind matches itself
+# or the highest compatible version (same major, equal or later minor/patch),
+# so osdu:wks:X:1.0.0 is served by X:1.1.0 when 1.0.0 is not in the library.
+# kinds() lists only the kinds the library files declare. Manifests are read
+# from disk only when asked for.
+class ManifestLibrary:
+    def __init__(self, manifests_dir=default_manifests_dir, index_file=default_index_file, max_workers=None):
+        self.manifests_dir = manifests_dir
+        with ManifestKindIndex(manifests_dir, index_file) as index:
+            index.refresh(max_workers)
+            entries = index.entries()
+        # Several files may declare one kind; the most recently modified wins
+        self.files = {}
+        for kind, name, mtime_ns in sorted(entries, key=lambda entry: entry[2]):
+            self.files.setdefault(kind, []).insert(0, name)
+        self.versions = {}
+        for kind in self.files:
+            base, version = parse_kind(kind)
+            self.versions.setdefault(base, []).append((version or (), kind))
+        for versions in self.versions.values():
+            versions.sort(reverse=True)
+        self._resolved = {}
+
+    def resolve(self, kind):
+        # The library kind serving kind, or None
+        if kind in self.files:
+            return kind
+        if kind not in self._resolved:
+            base, requested = parse_kind(kind)
+            self._resolved[kind] = next((candidate for version, candidate in self.versions.get(base, ())
+                                         if compatible(version or None, requested)), None)
+        return self._resolved[kind]
+
+    def files_for(self, kind):
+        # Paths of the manifests declaring the kind that serves kind, newest first
+        resolved = self.resolve(kind) if isinstance(kind, str) else None
+        return [os.path.join(self.manifests_dir, name) for name in self.files.get(resolved, ())]
+
+    def manifest(self, kind):
+        # The newest manifest serving kind, or None
+        paths = self.files_for(kind)
+        if not paths:
+            return None
+        with open(paths[0], 'r') as f:
+            return json.load(f)
+
+    def kinds(self):
+        # The kinds declared by the library files, each once
+        return list(self.files)
+
+    def __contains__(self, kind):
+        # True when some library kind serves kind
+        return isinstance(kind, str) and self.resolve(kind) is not None
@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from inventory_store import atomic_output
+
+data_dir = 'data'
+schemas_dir = os.path.join(data_dir, 'schemas')
+flat_schemas_file = os.path.join(data_dir, 'flat_schemas.json')
+
+# Manifest lines handed to one worker task
+validation_chunk_size = 2000
+
+# Files with fewer manifest lines than this are validated in-process
+parallel_min_lines = 20000
+
+# JSON inside a markdown code fence, as the generated schema files may hold
+FENCED_JSON_PATTERN = re.compile(r'```(?:json)?\s*(\{.*\})\s*```', re.DOTALL)
+
+def schema_file_key(name):
+    # Schema files are named after the schema; kinds contain ':' which may not survive
+    return re.sub(r'[^\w\-.]', '_', name).lower()
+
+def parse_schema_text(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        match = FENCED_JSON_PATTERN.search(text)
+        if match:
+            return json.loads(match.group(1))
+        raise
+
+def schema_kinds(schema):
+    # Kinds a schema declares for itself besides its file name
+    kinds = []
+    for key in ('x-osdu-schema-source', 'kind'):
+        if isinstance(schema.get(key), str):
+            kinds.append(schema[key])
+    if isinstance(schema.get('$id'), str):
+        kinds.append(schema['$id'].rstrip('/').rsplit('/', 1)[-1].replace('.json', ''))
+    return kinds
+
+@lru_cache(maxsize=None)
+def schema_index(directory=schemas_dir, flat_file=flat_schemas_file):
+    # {schema file key: path} for every schema listed in flat_schemas.json or
+    # present in the schemas directory
+    index = {}
+    if os.path.exists(flat_file):
+        with open(flat_file, 'r') as f:
+            for entry in json.load(f):
+                path = os.path.join(directory, f"{entry['schema']}.json")
+                if os.path.exists(path):
+                    index[schema_file_key(entry['schema'])] = path
+    if os.path.isdir(directory):
+        for filename in os.listdir(directory):
+            if filename.endswith('.json'):
+                index.setdefault(schema_file_key(filename[:-len('.json')]), os.path.join(directory, filename))
+    return index
+
+@lru_cache(maxsize=None)
+def declared_kinds(directory=schemas_dir, flat_file=flat_schemas_file):
+    # Second pass for schemas whose file name does not match their kind
+    kinds = {}
+    for path in schema_index(directory, flat_file).values():
+        try:
+            with open(path, 'r') as f:
+                schema = parse_schema_text(f.read())
+        except (OSError, ValueError):
+            continue
+        for kind in schema_kinds(schema):
+            kinds.setdefault(schema_file_key(kind), path)
+    return kinds
+
+@lru_cache(maxsize=None)
+def compiled_validator(kind, directory=schemas_dir, flat_file=flat_schemas_file):
+    # One compiled validator per kind and process; None when no schema covers the kind
+    from jsonschema.validators import validator_for
+    key = schema_file_key(kind)
+    path = schema_index(directory, flat_file).get(key) or declared_kinds(directory, flat_file).get(key)
+    if path is None:
+        return None
+    with open(path, 'r') as f:
+        schema = parse_schema_text(f.read())
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+def manifest_of(record):
+    # Per-file lines hold {"FilePath", "manifest"}, combined lines {"ManifestID", ..., "manifest"}
+    return record.get('manifest', record) if isinstance(record, dict) else record
+
+def validate_lines(lines, directory=schemas_dir, flat_file=flat_schemas_file):
+    # Returns (kind, status, error, seconds) per line; status is 'valid',
+    # 'invalid' or 'unchecked' (no schema for the kind)
+    results = []
+    for line in lines:
+        started = time.perf_counter()
+        kind = None
+        try:
+            manifest = manifest_of(json.loads(line))
+            kind = manifest.get('kind') if isinstance(manifest, dict) else None
+            if not kind:
+                results.append((kind, 'invalid', "manifest has no 'kind'", time.perf_counter() - started))
+                continue
+            validator = compiled_validator(kind, directory, flat_file)
+            if validator is None:
+                results.append((kind, 'unchecked', None, time.perf_counter() - started))
+                continue
+            error = next(validator.iter_errors(manifest), None)
+            if error is None:
+                results.append((kind, 'valid', None, time.perf_counter() - started))
+            else:
+                location = '/'.join(str(part) for part in error.absolute_path)
+                results.append((kind, 'invalid', f"{location}: {error.message}", time.perf_counter() - started))
+        except Exception as e:
+            results.append((kind, 'invalid', str(e), time.perf_counter() - started))
+    return results
+
+def iter_line_chunks(path, chunk_size):
+    chunk = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                chunk.append(line.rstrip('\n'))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+def count_lines(path):
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f)
+
+def quarantined(report, require_schema=False):
+    # (invalid, without schema) counts of the manifests a run quarantined;
+    # manifests without a schema are only quarantined under require_schema
+    invalid = sum(stats['invalid'] for stats in report.values())
+    unchecked = sum(stats['unchecked'] for stats in report.values()) if require_schema else 0
+    return invalid, unchecked
+
+def validate_manifests(input_file, output_file=None, quarantine_file=None, require_schema=False, max_workers=None,
+                       chunk_size=validation_chunk_size, directory=schemas_dir, flat_file=flat_schemas_file):
+    # Validate every manifest line of input_file against the schema of its
+    # kind. Valid lines (and, unless require_schema, lines whose kind has no
+    # schema) go to output_file, which defaults to replacing input_file;
+    # invalid lines go to quarantine_file with the first error. Returns the
+    # per-kind report, which is also printed.
+    output_file = output_file or input_file
+    quarantine_file = quarantine_file or os.path.join(data_dir, 'quarantined_manifests.ndjson')
+    max_workers = max_workers or os.cpu_count() or 1
+    report = defaultdict(lambda: {'total': 0, 'valid': 0, 'invalid': 0, 'unchecked': 0, 'seconds': 0.0})
+    started = time.perf_counter()
+
+    with atomic_output(output_file) as temp_output, atomic_output(quarantine_file) as temp_quarantine:
+        with open(temp_output, 'w', encoding='utf-8') as output, open(temp_quarantine, 'w', encoding='utf-8') as quarantine:
+            def write(lines, results):
+                for line, (kind, status, error, seconds) in zip(lines, results):
+                    stats = report[kind or 'unknown']
+                    stats['total'] += 1
+                    stats[status] += 1
+                    stats['seconds'] += seconds
+                    if status == 'valid' or (status == 'unchecked' and not require_schema):
+                        output.write(line + '\n')
+                    else:
+                        # A parsed line is embedded as is rather than re-encoded; one
+                        # that did not parse is kept as a string
+                        entry = json.dumps({'kind': kind, 'status': status, 'error': error or 'no schema for kind'})
+                        record = line if kind is not None else json.dumps(line)
+                        quarantine.write(entry[:-1] + ',"record":' + record + '}\n')
+
+            chunks = iter_line_chunks(input_file, chunk_size)
+            if max_workers == 1 or count_lines(input_file) < parallel_min_lines:
+                for lines in chunks:
+                    write(lines, validate_lines(lines, directory, flat_file))
+            else:
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    pending = []
+                    for lines in chunks:
+                        pending.append((lines, executor.submit(validate_lines, lines, directory, flat_file)))
+                        if len(pending) >= max_workers * 2:
+                            lines, future = pending.pop(0)
+                            write(lines, future.result())
+                    for lines, future in pending:
+                        write(lines, future.result())
+
+    elapsed = time.perf_counter() - started
+    report = dict(report)
+    for kind, stats in sorted(report.items()):
+        print(f"{kind}: {stats['total']} manifests, {stats['valid']} valid, {stats['invalid']} invalid, "
+              f"{stats['unchecked']} without schema, {stats['seconds']:.2f}s validating")
+    invalid, unchecked = quarantined(report, require_schema)
+    print(f"Validated {sum(stats['total'] for stats in report.values())} manifests in {elapsed:.2f}s; "
+          f"{invalid + unchecked} quarantined to {quarantine_file} ({invalid} invalid, {unchecked} without schema)")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate generated manifests against their kind's schema")
+    parser.add_argument('--input-file', default=os.path.join(data_dir, 'generated_manifests.ndjson'), help='Manifest NDJSON file')
+    parser.add_argument('--output-file', default=None, help='Where valid manifests go (default: replace the input)')
+    parser.add_argument('--quarantine-file', default=None, help='Where invalid manifests go')
+    parser.add_argument('--require-schema', action='store_true', help='Quarantine manifests whose kind has no schema')
+    args = parser.parse_args()
+    report = validate_manifests(args.input_file, args.output_file, args.quarantine_file, args.require_schema)
+    with open(os.path.join(data_dir, 'manifest_validation_report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
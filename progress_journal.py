@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import sqlite3
+
+data_dir = 'data'
+default_journal_file = os.path.join(data_dir, 'json_to_csv_journal.sqlite')
+
+# Completed LAS results are committed in batches of this many
+commit_every = 50
+
+# Durable record of an interrupted json_to_csv run. The LAS pass journals
+# every parsed blob with its result, the classification pass journals every
+# batch it has written as a part file. A rerun over the same input skips
+# whatever the journal already holds. A journal written for other input or
+# options is discarded on open.
+class ProgressJournal:
+    def __init__(self, run_key, path=default_journal_file):
+        self.path = path
+        self.parts_dir = os.path.splitext(path)[0] + '_parts'
+        self._pending = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS las (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                container TEXT NOT NULL,
+                name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                UNIQUE (container, name)
+            )
+        """)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS batches (batch INTEGER PRIMARY KEY, rows INTEGER NOT NULL)")
+        self.run_key = json.dumps(run_key, sort_keys=True)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'run'").fetchone()
+        self.resumed = row is not None and row[0] == self.run_key
+        if not self.resumed:
+            self.reset()
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # An interrupted or failed run keeps everything it finished
+        self.close()
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.save()
+        self.conn.close()
+        self.conn = None
+
+    def save(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def reset(self):
+        self.conn.execute("DELETE FROM meta")
+        self.conn.execute("DELETE FROM las")
+        self.conn.execute("DELETE FROM batches")
+        self.conn.execute("INSERT INTO meta VALUES ('run', ?)", (self.run_key,))
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+    def completed_las(self):
+        # {(container, name): well_data} in the order the results arrived
+        return {(container, name): json.loads(payload) for container, name, payload in
+                self.conn.execute("SELECT container, name, payload FROM las ORDER BY seq")}
+
+    def record_las(self, container, name, well_data):
+        self.conn.execute("INSERT OR REPLACE INTO las (container, name, payload) VALUES (?, ?, ?)",
+                          (container, name, json.dumps(well_data, default=str)))
+        self._pending += 1
+        if self._pending >= commit_every:
+            self.save()
+
+    def is_done(self, step):
+        return self.conn.execute("SELECT 1 FROM meta WHERE key = ?", ('done:' + step,)).fetchone() is not None
+
+    def mark_done(self, step):
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, '1')", ('done:' + step,))
+        self.save()
+
+    def part_path(self, batch, extension):
+        os.makedirs(self.parts_dir, exist_ok=True)
+        return os.path.join(self.parts_dir, f"part-{batch:06d}{extension}")
+
+    def completed_batches(self):
+        # Number of leading batches whose part files are written
+        batches = [batch for (batch,) in self.conn.execute("SELECT batch FROM batches ORDER BY batch")]
+        return next((i for i, batch in enumerate(batches) if batch != i), len(batches))
+
+    def journaled_rows(self):
+        return self.conn.execute("SELECT COALESCE(SUM(rows), 0) FROM batches").fetchone()[0]
+
+    def record_batch(self, batch, rows):
+        self.conn.execute("INSERT OR REPLACE INTO batches VALUES (?, ?)", (batch, rows))
+        self.save()
+
+    def remove(self):
+        # The run completed; nothing is left to resume
+        self.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+def input_identity(path):
+    # Changes whenever the input file is rewritten
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
@@ -0,0 +1,55 @@
+import time
+from logger import ingestion_logger
+
+# Progress is logged at most this often
+log_interval = 10.0
+
+# The failure count and details next to the bar are refreshed this often
+postfix_interval = 1.0
+
+# Counts finished ingestion tasks and reports the rate as they complete. The
+# total may be unknown (None) when the manifests are streamed. details, if
+# given, returns a dict (e.g. the limiter's stats) shown and logged alongside.
+class ProgressTracker:
+    def __init__(self, total=None, description="Ingesting", details=None):
+        from tqdm import tqdm
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.details = details
+        self.started = time.perf_counter()
+        self._logged = self.started
+        self._shown = 0.0
+        self.bar = tqdm(total=total, desc=description, unit="file")
+
+    def update(self, count=1, failed=False):
+        self.done += count
+        if failed:
+            self.failed += count
+        now = time.perf_counter()
+        if now - self._shown >= postfix_interval:
+            self._shown = now
+            self.show_postfix()
+        if now - self._logged >= log_interval:
+            self._logged = now
+            ingestion_logger.info(self.status())
+        self.bar.update(count)
+
+    def show_postfix(self):
+        self.bar.set_postfix(failed=self.failed, **(self.details() if self.details else {}), refresh=False)
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def status(self):
+        total = f"/{self.total}" if self.total is not None else ""
+        status = f"{self.done}{total} files processed, {self.failed} failed, {self.rate():.1f} files/s"
+        if self.details:
+            status += ', ' + ', '.join(f"{key} {value}" for key, value in self.details().items())
+        return status
+
+    def complete(self):
+        self.show_postfix()
+        self.bar.close()
+        ingestion_logger.info(f"Ingestion finished: {self.status()}")
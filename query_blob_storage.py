@@ -1,32 +1,31 @@
 import os
 from dotenv import load_dotenv
-from azure.storage.blob import BlobServiceClient, ContainerClient, BlobPrefix
-import json
-import csv
+from azure.storage.blob.aio import BlobServiceClient
+from inventory_store import CompactInventoryWriter, atomic_output, iter_inventory_rows, iter_batches
+from inventory_index import InventoryIndex, default_index_file
 from azure.core.exceptions import ResourceNotFoundError
+import argparse
+import asyncio
 import base64
 import datetime
+from operator import attrgetter
 
 data_dir = 'data'
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Get the storage account URL and SAS token from environment variables
-account_url = os.getenv('AZURE_STORAGE_ACCOUNT_URL')
-sas_token = os.getenv('AZURE_STORAGE_SAS_TOKEN')
-
-# Create the BlobServiceClient object
-blob_service_client = BlobServiceClient(account_url=account_url, credential=sas_token)
+# The container holding the Volve data, and the folder it sits in. Other
+# containers are listed whole unless a prefix is given.
+volve_container = "corpus"
+root_prefix = "files/Volve/"
 
-# Specify the container name
-container_name = "corpus"
+# Number of listings that may be in flight at the same time
+max_concurrent_listings = 16
 
-# Get a reference to the container
-container_client = blob_service_client.get_container_client(container_name)
+# Page size requested from the List Blobs API (5000 is the service maximum)
+results_per_page = 5000
 
-def get_subfolders(prefix):
-    return [blob.name for blob in container_client.walk_blobs(name_starts_with=prefix, delimiter='/') if isinstance(blob, BlobPrefix)]
+# A prefix that does not fit in one page gets split into its sub-prefixes
+# instead of being walked with a single cursor, down to this many levels.
+max_split_depth = 6
 
 def json_serializable(obj):
     if isinstance(obj, (bytes, bytearray)):
@@ -35,173 +34,296 @@ def json_serializable(obj):
         return obj.isoformat()
     return str(obj)
 
-def get_blob_info(prefix):
-    blob_info_list = []
-    blobs = container_client.list_blobs(name_starts_with=prefix)
-    for blob in blobs:
-        if not blob.name.endswith('/'):  # Exclude folder names
-            blob_info = {
-                "container": container_name,
-                "content": "",
-                "deleted": json_serializable(blob.deleted),
-                "encryptedMetadata": json_serializable(blob.encrypted_metadata),
-                "encryptionKeySha256": json_serializable(blob.encryption_key_sha256),
-                "encryptionScope": json_serializable(blob.encryption_scope),
-                "hasLegalHold": json_serializable(blob.has_legal_hold),
-                "hasVersionsOnly": json_serializable(blob.has_versions_only),
-                "immutabilityPolicy": {
-                    "expiryTime": json_serializable(blob.immutability_policy.expiry_time) if blob.immutability_policy else None,
-                    "policyMode": json_serializable(blob.immutability_policy.policy_mode) if blob.immutability_policy else None
-                },
-                "isCurrentVersion": json_serializable(blob.is_current_version),
-                "lastAccessedOn": json_serializable(blob.last_accessed_on),
-                "leaseDuration": json_serializable(blob.lease.duration) if blob.lease else None,
-                "leaseState": json_serializable(blob.lease.state) if blob.lease else None,
-                "leaseStatus": json_serializable(blob.lease.status) if blob.lease else None,
-                "metadata": json_serializable(blob.metadata),
-                "name": json_serializable(blob.name),
-                "properties": {
-                    "appendBlobCommittedBlockCount": json_serializable(blob.append_blob_committed_block_count),
-                    "blobTier": json_serializable(blob.blob_tier),
-                    "blobTierChangeTime": json_serializable(blob.blob_tier_change_time),
-                    "blobTierInferred": json_serializable(blob.blob_tier_inferred),
-                    "blobType": json_serializable(blob.blob_type),
-                    "contentLength": json_serializable(blob.size),
-                    "contentRange": json_serializable(blob.content_range),
-                    "contentSettings": {
-                        "cacheControl": json_serializable(blob.content_settings.cache_control),
-                        "contentDisposition": json_serializable(blob.content_settings.content_disposition),
-                        "contentEncoding": json_serializable(blob.content_settings.content_encoding),
-                        "contentLanguage": json_serializable(blob.content_settings.content_language),
-                        "contentMd5": json_serializable(blob.content_settings.content_md5),
-                        "contentType": json_serializable(blob.content_settings.content_type)
-                    },
-                    "copyCompletionTime": json_serializable(blob.copy.completion_time) if blob.copy else None,
-                    "copyId": json_serializable(blob.copy.id) if blob.copy else None,
-                    "copyProgress": json_serializable(blob.copy.progress) if blob.copy else None,
-                    "copySource": json_serializable(blob.copy.source) if blob.copy else None,
-                    "copyStatus": json_serializable(blob.copy.status) if blob.copy else None,
-                    "copyStatusDescription": json_serializable(blob.copy.status_description) if blob.copy else None,
-                    "creationTime": json_serializable(blob.creation_time),
-                    "deletedTime": json_serializable(blob.deleted_time),
-                    "etag": json_serializable(blob.etag),
-                    # "expiresOn": json_serializable(blob.expires_on),
-                    "lastModified": json_serializable(blob.last_modified),
-                    "leaseDuration": json_serializable(blob.lease.duration) if blob.lease else None,
-                    "leaseState": json_serializable(blob.lease.state) if blob.lease else None,
-                    "leaseStatus": json_serializable(blob.lease.status) if blob.lease else None,
-                    "pageBlobSequenceNumber": json_serializable(blob.page_blob_sequence_number),
-                    # "pageRanges": json_serializable(blob.page_ranges),
-                    # "rehydrationStatus": json_serializable(blob.rehydration_status),
-                    "remainingRetentionDays": json_serializable(blob.remaining_retention_days),
-                    "serverEncrypted": json_serializable(blob.server_encrypted)
-                },
-                "rehydratePriority": json_serializable(blob.rehydrate_priority),
-                "requestServerEncrypted": json_serializable(blob.request_server_encrypted),
-                "snapshot": json_serializable(blob.snapshot),
-                "tagCount": json_serializable(blob.tag_count),
-                "tags": json_serializable(blob.tags),
-                "versionId": json_serializable(blob.version_id)
-            }
-            blob_info_list.append(blob_info)
-    return blob_info_list
-    blob_info_list = []
-    blobs = container_client.list_blobs(name_starts_with=prefix)
-    for blob in blobs:
-        if not blob.name.endswith('/'):  # Exclude folder names
-            blob_info = {
-                "container": container_name,
-                "content": "",
-                "deleted": json_serializable(blob.deleted),
-                "encryptedMetadata": json_serializable(blob.encrypted_metadata),
-                "encryptionKeySha256": json_serializable(blob.encryption_key_sha256),
-                "encryptionScope": json_serializable(blob.encryption_scope),
-                "hasLegalHold": json_serializable(blob.has_legal_hold),
-                "hasVersionsOnly": json_serializable(blob.has_versions_only),
-                "immutabilityPolicy": {
-                    "expiryTime": json_serializable(blob.immutability_policy.expiry_time) if blob.immutability_policy else None,
-                    "policyMode": json_serializable(blob.immutability_policy.policy_mode) if blob.immutability_policy else None
-                },
-                "isCurrentVersion": json_serializable(blob.is_current_version),
-                "lastAccessedOn": json_serializable(blob.last_accessed_on),
-                "leaseDuration": json_serializable(blob.lease.duration) if blob.lease else None,
-                "leaseState": json_serializable(blob.lease.state) if blob.lease else None,
-                "leaseStatus": json_serializable(blob.lease.status) if blob.lease else None,
-                "metadata": json_serializable(blob.metadata),
-                "name": json_serializable(blob.name),
-                "properties": {
-                    "appendBlobCommittedBlockCount": json_serializable(blob.properties.append_blob_committed_block_count),
-                    "blobTier": json_serializable(blob.properties.blob_tier),
-                    "blobTierChangeTime": json_serializable(blob.properties.blob_tier_change_time),
-                    "blobTierInferred": json_serializable(blob.properties.blob_tier_inferred),
-                    "blobType": json_serializable(blob.properties.blob_type),
-                    "contentLength": json_serializable(blob.properties.content_length),
-                    "contentRange": json_serializable(blob.properties.content_range),
-                    "contentSettings": {
-                        "cacheControl": json_serializable(blob.properties.content_settings.cache_control),
-                        "contentDisposition": json_serializable(blob.properties.content_settings.content_disposition),
-                        "contentEncoding": json_serializable(blob.properties.content_settings.content_encoding),
-                        "contentLanguage": json_serializable(blob.properties.content_settings.content_language),
-                        "contentMd5": json_serializable(blob.properties.content_settings.content_md5),
-                        "contentType": json_serializable(blob.properties.content_settings.content_type)
-                    },
-                    "copyCompletionTime": json_serializable(blob.properties.copy.completion_time),
-                    "copyId": json_serializable(blob.properties.copy.id),
-                    "copyProgress": json_serializable(blob.properties.copy.progress),
-                    "copySource": json_serializable(blob.properties.copy.source),
-                    "copyStatus": json_serializable(blob.properties.copy.status),
-                    "copyStatusDescription": json_serializable(blob.properties.copy.status_description),
-                    "creationTime": json_serializable(blob.properties.creation_time),
-                    "deletedTime": json_serializable(blob.properties.deleted_time),
-                    "etag": json_serializable(blob.properties.etag),
-                    # "expiresOn": json_serializable(blob.properties.expires_on),
-                    "lastModified": json_serializable(blob.properties.last_modified),
-                    "leaseDuration": json_serializable(blob.properties.lease.duration),
-                    "leaseState": json_serializable(blob.properties.lease.state),
-                    "leaseStatus": json_serializable(blob.properties.lease.status),
-                    "pageBlobSequenceNumber": json_serializable(blob.properties.page_blob_sequence_number),
-                    # "pageRanges": json_serializable(blob.properties.page_ranges),
-                    # "rehydrationStatus": json_serializable(blob.properties.rehydration_status),
-                    "remainingRetentionDays": json_serializable(blob.properties.remaining_retention_days),
-                    "serverEncrypted": json_serializable(blob.properties.server_encrypted)
-                },
-                "rehydratePriority": json_serializable(blob.rehydrate_priority),
-                "requestServerEncrypted": json_serializable(blob.request_server_encrypted),
-                "snapshot": json_serializable(blob.snapshot),
-                "tagCount": json_serializable(blob.tag_count),
-                "tags": json_serializable(blob.tags),
-                "versionId": json_serializable(blob.version_id)
-            }
-            blob_info_list.append(blob_info)
-    return blob_info_list
-
-# Start with the Volve folder
-root_prefix = "files/Volve/"
-all_blob_info = []
+def to_isoformat(value):
+    return value.isoformat()
+
+def to_base64(value):
+    return base64.b64encode(value).decode('utf-8')
+
+# Inventory field name -> (attribute path on BlobProperties, converter for
+# values that are not JSON native). Only the requested fields are read.
+BLOB_FIELDS = {
+    "name": ("name", None),
+    "contentLength": ("size", None),
+    "lastModified": ("last_modified", to_isoformat),
+    "creationTime": ("creation_time", to_isoformat),
+    "etag": ("etag", None),
+    "contentType": ("content_settings.content_type", None),
+    "contentEncoding": ("content_settings.content_encoding", None),
+    "contentLanguage": ("content_settings.content_language", None),
+    "contentDisposition": ("content_settings.content_disposition", None),
+    "cacheControl": ("content_settings.cache_control", None),
+    "contentMd5": ("content_settings.content_md5", to_base64),
+    "blobType": ("blob_type", None),
+    "blobTier": ("blob_tier", None),
+    "blobTierChangeTime": ("blob_tier_change_time", to_isoformat),
+    "blobTierInferred": ("blob_tier_inferred", None),
+    "metadata": ("metadata", None),
+    "tags": ("tags", None),
+    "tagCount": ("tag_count", None),
+    "versionId": ("version_id", None),
+    "isCurrentVersion": ("is_current_version", None),
+    "snapshot": ("snapshot", None),
+    "deleted": ("deleted", None),
+    "deletedTime": ("deleted_time", to_isoformat),
+    "remainingRetentionDays": ("remaining_retention_days", None),
+    "lastAccessedOn": ("last_accessed_on", to_isoformat),
+    "serverEncrypted": ("server_encrypted", None),
+    "encryptionScope": ("encryption_scope", None),
+    "encryptionKeySha256": ("encryption_key_sha256", None),
+    "requestServerEncrypted": ("request_server_encrypted", None),
+    "hasLegalHold": ("has_legal_hold", None),
+    "hasVersionsOnly": ("has_versions_only", None),
+    "immutabilityPolicyExpiryTime": ("immutability_policy.expiry_time", to_isoformat),
+    "immutabilityPolicyMode": ("immutability_policy.policy_mode", None),
+    "leaseDuration": ("lease.duration", None),
+    "leaseState": ("lease.state", None),
+    "leaseStatus": ("lease.status", None),
+    "copyId": ("copy.id", None),
+    "copySource": ("copy.source", None),
+    "copyStatus": ("copy.status", None),
+    "copyProgress": ("copy.progress", None),
+    "copyCompletionTime": ("copy.completion_time", to_isoformat),
+    "copyStatusDescription": ("copy.status_description", None),
+    "appendBlobCommittedBlockCount": ("append_blob_committed_block_count", None),
+    "pageBlobSequenceNumber": ("page_blob_sequence_number", None),
+    "rehydratePriority": ("rehydrate_priority", None),
+}
+
+# The fields process_blob and the later stages actually read
+DEFAULT_FIELDS = ("name", "contentLength", "lastModified", "creationTime", "etag", "contentType", "blobType", "blobTier")
+
+class BlobProjection:
+    # Turns a BlobProperties into a flat list of the requested fields. All
+    # attribute lookups go through one attrgetter, and only the positions that
+    # hold datetimes/bytes are converted.
+    __slots__ = ('fields', '_get', '_converters')
+
+    def __init__(self, fields=DEFAULT_FIELDS):
+        if fields == 'all':
+            fields = tuple(BLOB_FIELDS)
+        unknown = [field for field in fields if field not in BLOB_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown inventory fields: {', '.join(unknown)}")
+        # name always comes first so rows can be keyed without a lookup
+        self.fields = ('name',) + tuple(field for field in fields if field != 'name')
+        paths = [BLOB_FIELDS[field][0] for field in self.fields]
+        getter = attrgetter(*paths)
+        self._get = getter if len(paths) > 1 else (lambda blob: (getter(blob),))
+        self._converters = [(i, BLOB_FIELDS[field][1]) for i, field in enumerate(self.fields) if BLOB_FIELDS[field][1]]
+
+    def __call__(self, blob):
+        row = list(self._get(blob))
+        for i, converter in self._converters:
+            if row[i] is not None:
+                row[i] = converter(row[i])
+        return row
+
+def is_prefix(item):
+    # walk_blobs yields BlobPrefix entries for "folders"; their names end with the delimiter
+    return item.name.endswith('/')
+
+async def list_prefix(container_client, prefix, depth, queue, on_page, continuation_token=None):
+    # List one prefix page by page, resuming at continuation_token if given. If
+    # the prefix needs more than one page and we are still allowed to split,
+    # the rest of it is handed back to the queue as sub-prefixes, listed in
+    # parallel instead of following one long continuation chain. The first
+    # page is kept either way.
+    pages = container_client.list_blobs(name_starts_with=prefix or None, results_per_page=results_per_page).by_page(continuation_token)
+    first_page = True
+    async for page in pages:
+        blobs = [blob async for blob in page]
+        on_page([blob for blob in blobs if not is_prefix(blob)])  # Exclude folder names
+        if first_page and blobs and pages.continuation_token and depth < max_split_depth:
+            await split_prefix(container_client, prefix, depth, queue, on_page, blobs[-1].name, pages.continuation_token)
+            return
+        first_page = False
+
+async def split_prefix(container_client, prefix, depth, queue, on_page, listed_to, continuation_token):
+    # Names up to listed_to have been listed already. Listings are in name
+    # order, so a sub-prefix sorting before listed_to is done, the one holding
+    # listed_to resumes at the continuation token (the position right after
+    # listed_to), and later ones are listed from their start.
+    blobs = []
+    async for item in container_client.walk_blobs(name_starts_with=prefix or None, delimiter='/'):
+        if not is_prefix(item):
+            if item.name <= listed_to:
+                continue
+            blobs.append(item)
+            if len(blobs) >= results_per_page:
+                on_page(blobs)
+                blobs = []
+        elif item.name == prefix:  # skip zero-length "folder" marker blobs
+            continue
+        elif listed_to.startswith(item.name):
+            queue.put_nowait((item.name, depth + 1, continuation_token))
+        elif item.name > listed_to:
+            queue.put_nowait((item.name, depth + 1, None))
+    if blobs:
+        on_page(blobs)
+
+async def inventory_container(container_client, on_page, prefix='', max_concurrency=max_concurrent_listings):
+    # Fan out over prefixes with a fixed number of workers. Each worker takes a
+    # prefix from the queue and lists it; oversized prefixes push their children
+    # back onto the queue, so the tree is split only where it is actually large.
+    queue = asyncio.Queue()
+    queue.put_nowait((prefix, 0, None))
+    errors = []
+
+    async def worker():
+        while True:
+            current_prefix, depth, continuation_token = await queue.get()
+            try:
+                await list_prefix(container_client, current_prefix, depth, queue, on_page, continuation_token)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(max_concurrency)]
+    try:
+        await queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    if errors:
+        raise errors[0]
+
+async def write_inventory(container_client, container_name, output_file, prefix='', max_concurrency=max_concurrent_listings, fields=DEFAULT_FIELDS):
+    # Each listed page is projected and flushed to the NDJSON file straight away
+    project = BlobProjection(fields)
+    with CompactInventoryWriter(output_file, container_name, project.fields, default=json_serializable) as writer:
+        def on_page(blobs):
+            writer.write_many([project(blob) for blob in blobs])
+
+        await inventory_container(container_client, on_page, prefix, max_concurrency)
+    return writer.count
+
+def merge_pending_delta(pending_file, new_file, output_file, batch_size=100000):
+    # A delta no json_to_csv --delta run has applied yet is still pending; the
+    # index already counts its blobs as seen, so it must not be overwritten.
+    # The new delta is folded into it instead, the latest change of a blob winning.
+    new_rows = iter_inventory_rows(new_file)
+    fields, container = next(new_rows)
+    new_rows = list(new_rows)
+    pending_rows = iter_inventory_rows(pending_file)
+    pending_fields, _ = next(pending_rows)
+    if pending_fields != fields:
+        raise ValueError(f"{pending_file} was written with fields {pending_fields}; apply it with "
+                         f"json_to_csv.py --delta before taking a delta with fields {fields}")
+    latest = {row[0] for row in new_rows}
+    with CompactInventoryWriter(output_file, container, fields) as writer:
+        for batch in iter_batches((row for row in pending_rows if row[0] not in latest), batch_size):
+            writer.write_many(batch)
+        writer.write_many(new_rows)
+    return writer.count
+
+async def write_inventory_delta(container_client, container_name, output_file, index, prefix='', max_concurrency=max_concurrent_listings, fields=DEFAULT_FIELDS):
+    # Compare every listed page against the local index and serialize only the
+    # blobs that were added or changed since the last run, followed by the
+    # names that disappeared. Each record carries a "change" field. A pending
+    # delta left at output_file is merged with the new one, and the index only
+    # commits the run once the delta file is in place.
+    counts = {'added': 0, 'changed': 0, 'deleted': 0, 'unchanged': 0}
+    project = BlobProjection(fields)
+    empty = [None] * (len(project.fields) - 1)
+    pending = os.path.exists(output_file)
+    index.begin_run(container_name, prefix)
+    with atomic_output(output_file) as temp_file:
+        new_file = temp_file + '.new' if pending else temp_file
+        with CompactInventoryWriter(new_file, container_name, project.fields + ('change',), default=json_serializable) as writer:
+            def on_page(blobs):
+                entries = [(blob.name, blob.etag, json_serializable(blob.last_modified), blob.size) for blob in blobs]
+                delta = index.observe(entries)
+                counts['unchanged'] += len(blobs) - len(delta)
+                records = []
+                for blob in blobs:
+                    change = delta.get(blob.name)
+                    if change:
+                        row = project(blob)
+                        row.append(change)
+                        records.append(row)
+                        counts[change] += 1
+                writer.write_many(records)
+
+            await inventory_container(container_client, on_page, prefix, max_concurrency)
+
+            deleted = index.finish_run()
+            writer.write_many([[name] + empty + ['deleted'] for name in deleted])
+            counts['deleted'] = len(deleted)
+        if pending:
+            counts['pending'] = merge_pending_delta(output_file, new_file, temp_file)
+            os.remove(new_file)
+    index.commit_run()
+    return counts
+
+async def inventory_blobs(connection_string, container_name, prefix=None, output_file=None, max_concurrency=max_concurrent_listings, index_file=None, fields=DEFAULT_FIELDS):
+    # With index_file set only the delta against the previous run is written.
+    # Without a prefix the Volve container is listed from root_prefix and any
+    # other container whole.
+    if prefix is None:
+        prefix = root_prefix if container_name == volve_container else ''
+    if output_file is None:
+        output_file = 'blob_inventory_delta.ndjson' if index_file else 'blob_inventory.ndjson'
+
+    async with BlobServiceClient.from_connection_string(connection_string) as blob_service_client:
+        container_client = blob_service_client.get_container_client(container_name)
+        if index_file:
+            with InventoryIndex(index_file) as index:
+                counts = await write_inventory_delta(container_client, container_name, output_file, index, prefix, max_concurrency, fields)
+            print(f"Blob inventory delta ({counts['added']} added, {counts['changed']} changed, "
+                  f"{counts['deleted']} deleted, {counts['unchanged']} unchanged) has been written to {output_file}")
+            return counts
+        count = await write_inventory(container_client, container_name, output_file, prefix, max_concurrency, fields)
+
+    print(f"Blob inventory of {count} blobs has been written to {output_file}")
+    return count
+
+async def main(delta=False, fields=DEFAULT_FIELDS):
+    # Load environment variables from .env file
+    load_dotenv()
 
-try:
-    # Get subfolders
-    subfolders = get_subfolders(root_prefix)
-    print(f"Subfolders found: {subfolders}")
+    # Get the storage account URL and SAS token from environment variables
+    account_url = os.getenv('AZURE_STORAGE_ACCOUNT_URL')
+    sas_token = os.getenv('AZURE_STORAGE_SAS_TOKEN')
 
-    # Process root folder
-    print(f"Processing root folder: {root_prefix}")
-    all_blob_info.extend(get_blob_info(root_prefix))
+    # Specify the container name
+    container_name = volve_container
+    output_file = os.path.join(data_dir, 'blob_inventory_volve.ndjson')
 
-    # Process each subfolder
-    for subfolder in subfolders:
-        print(f"Processing subfolder: {subfolder}")
-        all_blob_info.extend(get_blob_info(subfolder))
+    try:
+        async with BlobServiceClient(account_url=account_url, credential=sas_token) as blob_service_client:
+            container_client = blob_service_client.get_container_client(container_name)
+            print(f"Processing folder: {root_prefix}")
+            if delta:
+                # Only write what changed since the last indexed run
+                output_file = os.path.join(data_dir, 'blob_inventory_volve_delta.ndjson')
+                with InventoryIndex(default_index_file) as index:
+                    counts = await write_inventory_delta(container_client, container_name, output_file, index, root_prefix, fields=fields)
+                print(f"Delta: {counts['added']} added, {counts['changed']} changed, "
+                      f"{counts['deleted']} deleted, {counts['unchanged']} unchanged")
+                if 'pending' in counts:
+                    print(f"Merged into the delta not yet applied by json_to_csv.py --delta ({counts['pending']} records)")
+                print(f"Blob inventory delta has been written to {output_file}")
+                return
 
+            # Write the blob information to an NDJSON file in the 'data' directory
+            count = await write_inventory(container_client, container_name, output_file, root_prefix, fields=fields)
 
-    # Write the blob information to a JSON file in the 'data' directory
-    output_file = os.path.join(data_dir, 'blob_inventory_volve.json')
-    with open(output_file, 'w') as json_file:
-        json.dump(all_blob_info, json_file, indent=2, default=json_serializable)
+        print(f"Blob inventory of {count} blobs has been written to {output_file}")
 
-    print("Blob inventory has been written to blob_inventory_volve.json")
+    except ResourceNotFoundError:
+        print(f"Error: The container '{container_name}' or the prefix '{root_prefix}' was not found.")
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
 
-except ResourceNotFoundError:
-    print(f"Error: The container '{container_name}' or the prefix '{root_prefix}' was not found.")
-except Exception as e:
-    print(f"An error occurred: {str(e)}")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inventory the Volve blobs")
+    parser.add_argument('--delta', action='store_true', help='Only write blobs added, changed or deleted since the last --delta run')
+    parser.add_argument('--fields', default=','.join(DEFAULT_FIELDS),
+                        help="Comma separated inventory fields to capture, or 'all' (default: %(default)s)")
+    args = parser.parse_args()
+    fields = 'all' if args.fields == 'all' else tuple(field.strip() for field in args.fields.split(','))
+    asyncio.run(main(args.delta, fields))
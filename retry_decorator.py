@@ -0,0 +1,63 @@
+import asyncio
+import datetime
+import functools
+import re
+from email.utils import parsedate_to_datetime
+from logger import error_logger
+
+# Statuses worth another attempt besides 5xx: request timeout and throttling
+RETRY_STATUSES = (408, 429)
+
+def is_transient(e):
+    # Connection failures, timeouts and 408/429/5xx responses. Anything else,
+    # such as a 403 from an expired SAS or a 400 for a rejected block, will
+    # fail the same way again.
+    status = getattr(e, 'status', None)
+    if status is None:
+        status = getattr(e, 'status_code', None)
+    if isinstance(status, int):
+        return status in RETRY_STATUSES or status >= 500
+    if isinstance(e, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    import aiohttp
+    return isinstance(e, aiohttp.ClientConnectionError)
+
+def parse_retry_after(value, now=None):
+    # Seconds to wait from a Retry-After header, which holds either
+    # delta-seconds or an HTTP-date; None when it is missing or unreadable
+    if not value:
+        return None
+    value = value.strip()
+    if re.fullmatch(r'\d+(\.\d+)?', value):
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+def async_retry(max_attempts=3, delay=5, backoff=2, exceptions=(Exception,), retry_if=is_transient):
+    # Retries a coroutine function on the given exceptions for which
+    # retry_if(e) holds, waiting delay, delay * backoff, ... seconds between
+    # attempts; any other exception is raised at once. An exception carrying
+    # a retry_after (seconds, e.g. from a Retry-After header) waits that long instead.
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            wait = delay
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    return await func(*args, **kwargs)
+                except exceptions as e:
+                    if attempt == max_attempts or not retry_if(e):
+                        raise
+                    pause = getattr(e, 'retry_after', None)
+                    pause = wait if pause is None else pause
+                    error_logger.error(f"{func.__name__} failed (attempt {attempt}/{max_attempts}), retrying in {pause}s: {e}")
+                    await asyncio.sleep(pause)
+                    wait *= backoff
+        return wrapper
+    return decorator
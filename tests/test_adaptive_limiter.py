@@ -0,0 +1,68 @@
+import asyncio
+from adaptive_limiter import AdaptiveLimiter, decrease_factor
+
+def test_starts_at_ceiling_unless_told_otherwise():
+    assert AdaptiveLimiter(floor=2, ceiling=16).limit == 16
+    assert AdaptiveLimiter(floor=2, ceiling=16, initial=4).limit == 4
+    assert AdaptiveLimiter(floor=2, ceiling=16, initial=64).limit == 16
+    assert AdaptiveLimiter(floor=0, ceiling=0).limit == 1
+
+def test_success_grows_limit_up_to_ceiling():
+    limiter = AdaptiveLimiter(floor=1, ceiling=4, initial=2)
+    limiter.succeeded()
+    assert limiter.limit == 2.5
+    for _ in range(100):
+        limiter.succeeded()
+    assert limiter.limit == 4
+
+def test_throttle_halves_once_per_latency_and_respects_floor():
+    limiter = AdaptiveLimiter(floor=2, ceiling=32)
+    limiter.record_latency(60.0)
+    limiter.throttle()
+    assert limiter.limit == 32 * decrease_factor
+    limiter.throttle()
+    assert limiter.limit == 32 * decrease_factor
+    assert limiter.throttled == 2
+    limiter = AdaptiveLimiter(floor=2, ceiling=32)
+    for _ in range(10):
+        limiter._last_decrease = 0.0
+        limiter.throttle()
+    assert limiter.limit == 2
+
+def test_errors_and_slow_latency_stop_growth():
+    limiter = AdaptiveLimiter(floor=1, ceiling=32, initial=4)
+    for _ in range(10):
+        limiter.failed()
+    limiter.succeeded()
+    assert limiter.limit == 4
+    limiter = AdaptiveLimiter(floor=1, ceiling=32, initial=4)
+    limiter.record_latency(0.1)
+    for _ in range(20):
+        limiter.record_latency(10.0)
+    limiter.succeeded()
+    assert limiter.limit == 4
+
+def test_slots_never_exceed_limit():
+    async def run():
+        limiter = AdaptiveLimiter(floor=1, ceiling=3)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.active)
+                await asyncio.sleep(0.001)
+
+        await asyncio.gather(*(call() for _ in range(20)))
+        return peak, limiter.active
+    assert asyncio.run(run()) == (3, 0)
+
+def test_retry_after_pauses_new_slots():
+    async def run():
+        limiter = AdaptiveLimiter(floor=1, ceiling=4)
+        limiter.throttle(retry_after=0.05)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        async with limiter.slot():
+            return loop.time() - start
+    assert asyncio.run(run()) >= 0.04
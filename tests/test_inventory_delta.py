@@ -0,0 +1,79 @@
+import pytest
+from inventory_store import CompactInventoryWriter, iter_inventory_rows, read_inventory_table
+from json_to_csv import apply_inventory_delta, write_enhanced_inventory
+from query_blob_storage import DEFAULT_FIELDS, merge_pending_delta
+
+CONTAINER = 'test'
+
+NAMES = ['volve/well-1/logs/a.las', 'volve/well-1/logs/b.las', 'volve/seismic/survey.segy',
+         'volve/reports/summary.pdf', 'volve/production/rates.csv']
+
+def blob_row(name, etag='0x1'):
+    return [name, 1024, '2024-01-01T00:00:00+00:00', '2024-01-01T00:00:00+00:00', etag,
+            'application/octet-stream', 'BlockBlob', 'Hot']
+
+def write_inventory(path, fields, rows):
+    with CompactInventoryWriter(str(path), CONTAINER, fields) as writer:
+        writer.write_many(rows)
+
+def read_rows(path):
+    rows = iter_inventory_rows(str(path))
+    fields, _ = next(rows)
+    return fields, list(rows)
+
+@pytest.fixture
+def classified(tmp_path):
+    # An enhanced inventory (CSV and Parquet) classified from NAMES
+    inventory = tmp_path / 'blob_inventory.ndjson'
+    write_inventory(inventory, DEFAULT_FIELDS, [blob_row(name) for name in NAMES])
+    output_file, table_file = tmp_path / 'enhanced.csv', tmp_path / 'enhanced.parquet'
+    assert write_enhanced_inventory(str(inventory), str(output_file), str(table_file)) == len(NAMES)
+    return output_file, table_file
+
+def file_paths(table_file):
+    return read_inventory_table(str(table_file), columns=['FilePath'])['FilePath'].tolist()
+
+def test_empty_delta_leaves_rows(tmp_path, classified):
+    output_file, table_file = classified
+    delta_file = tmp_path / 'delta.ndjson'
+    write_inventory(delta_file, ['name', 'change'], [])
+    assert apply_inventory_delta(str(delta_file), str(output_file), str(table_file)) == (0, 0)
+    assert sorted(file_paths(table_file)) == sorted(NAMES)
+
+def test_deletions_only_delta_drops_rows(tmp_path, classified):
+    output_file, table_file = classified
+    delta_file = tmp_path / 'delta.ndjson'
+    delta_table = tmp_path / 'delta.parquet'
+    write_inventory(delta_file, ['name', 'change'], [[name, 'deleted'] for name in NAMES[:2]])
+    assert apply_inventory_delta(str(delta_file), str(output_file), str(table_file), str(delta_table)) == (0, 2)
+    assert sorted(file_paths(table_file)) == sorted(NAMES[2:])
+    assert file_paths(delta_table) == []
+
+def test_delta_reclassifies_changed_and_added(tmp_path, classified):
+    output_file, table_file = classified
+    delta_file = tmp_path / 'delta.ndjson'
+    fields = DEFAULT_FIELDS + ('change',)
+    write_inventory(delta_file, fields, [blob_row(NAMES[0], '0x2') + ['changed'],
+                                         blob_row('volve/well-2/logs/c.las') + ['added']])
+    assert apply_inventory_delta(str(delta_file), str(output_file), str(table_file)) == (2, 0)
+    paths = file_paths(table_file)
+    assert sorted(paths) == sorted(NAMES + ['volve/well-2/logs/c.las'])
+    assert len(paths) == len(set(paths))
+
+def test_merge_pending_delta_keeps_latest_change(tmp_path):
+    fields = ['name', 'etag', 'change']
+    pending, new, merged = tmp_path / 'pending.ndjson', tmp_path / 'new.ndjson', tmp_path / 'merged.ndjson'
+    write_inventory(pending, fields, [['a', '0x1', 'added'], ['b', '0x1', 'added'], ['c', '0x1', 'changed']])
+    write_inventory(new, fields, [['b', '0x2', 'changed'], ['c', None, 'deleted'], ['d', '0x1', 'added']])
+    assert merge_pending_delta(str(pending), str(new), str(merged), batch_size=1) == 4
+    merged_fields, rows = read_rows(merged)
+    assert merged_fields == fields
+    assert rows == [['a', '0x1', 'added'], ['b', '0x2', 'changed'], ['c', None, 'deleted'], ['d', '0x1', 'added']]
+
+def test_merge_pending_delta_rejects_other_fields(tmp_path):
+    pending, new = tmp_path / 'pending.ndjson', tmp_path / 'new.ndjson'
+    write_inventory(pending, ['name', 'change'], [['a', 'added']])
+    write_inventory(new, ['name', 'etag', 'change'], [['b', '0x1', 'added']])
+    with pytest.raises(ValueError):
+        merge_pending_delta(str(pending), str(new), str(tmp_path / 'merged.ndjson'))
+    assert read_rows(pending)[1] == [['a', 'added']]
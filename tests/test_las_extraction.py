@@ -0,0 +1,38 @@
+import asyncio
+from las_extraction import ByteBudget, curve_store_name
+
+async def acquired_within(budget, size, timeout=0.05):
+    try:
+        await asyncio.wait_for(budget.acquire(size), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+def test_byte_budget_blocks_until_release():
+    async def run():
+        budget = ByteBudget(100)
+        await budget.acquire(60)
+        assert await acquired_within(budget, 40)
+        waiter = asyncio.create_task(budget.acquire(30))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        await budget.release(60)
+        await asyncio.wait_for(waiter, 1)
+        assert budget.in_use == 70
+    asyncio.run(run())
+
+def test_byte_budget_lets_oversized_request_through_alone():
+    async def run():
+        budget = ByteBudget(100)
+        await budget.acquire(10)
+        assert not await acquired_within(budget, 500)
+        await budget.release(10)
+        assert await acquired_within(budget, 500)
+        assert not await acquired_within(budget, 1)
+    asyncio.run(run())
+
+def test_curve_store_names_do_not_collide():
+    names = {curve_store_name('a', 'logs/a/b.las'), curve_store_name('a', 'logs/a_b.las'),
+             curve_store_name('b', 'logs/a/b.las')}
+    assert len(names) == 3
+    assert curve_store_name('a', 'logs/well 1.las').startswith('well_1-')
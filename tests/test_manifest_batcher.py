@@ -0,0 +1,44 @@
+import csv
+import io
+import json
+from manifest_batcher import ManifestBatcher, group_key
+
+def run_batcher(records, **limits):
+    output, file_map = io.StringIO(), io.StringIO()
+    batcher = ManifestBatcher(output, csv.writer(file_map), **limits)
+    section = batcher.assembler.sections[0]
+    for group, file_path, size in records:
+        batcher.add(group, file_path, section, json.dumps({'FilePath': file_path, 'pad': 'x' * size}))
+    batcher.close()
+    manifests = [json.loads(line) for line in output.getvalue().splitlines()]
+    return batcher, manifests, list(csv.reader(io.StringIO(file_map.getvalue())))
+
+def test_group_key():
+    assert group_key('W1', 'S1', 'a/b.las') == 'well:W1'
+    assert group_key(None, 'S1', 'a/b.segy') == 'survey:S1'
+    assert group_key(None, None, 'a/b/c.pdf') == 'folder:a/b'
+
+def test_max_records_splits_group():
+    batcher, manifests, file_map = run_batcher([('g', f'f{i}', 10) for i in range(5)], max_records=2)
+    assert [m['FilePaths'] for m in manifests] == [['f0', 'f1'], ['f2', 'f3'], ['f4']]
+    assert (batcher.manifests, batcher.files) == (3, 5)
+    assert [row[1] for row in file_map] == ['manifest-0000001'] * 2 + ['manifest-0000002'] * 2 + ['manifest-0000003']
+
+def test_max_bytes_bounds_manifest_size():
+    _, base, _ = run_batcher([('g', 'f0', 0)])
+    max_bytes = len(json.dumps(base[0]['manifest'], separators=(',', ':'))) + 600
+    _, manifests, _ = run_batcher([('g', f'f{i}', 200) for i in range(6)], max_bytes=max_bytes)
+    assert len(manifests) > 1
+    assert sum(len(m['FilePaths']) for m in manifests) == 6
+    for manifest in manifests:
+        assert len(json.dumps(manifest['manifest'], separators=(',', ':'))) <= max_bytes
+
+def test_oversized_record_gets_own_manifest():
+    _, manifests, _ = run_batcher([('g', 'small', 10), ('g', 'big', 5000), ('g', 'after', 10)], max_bytes=2000)
+    assert [m['FilePaths'] for m in manifests] == [['small'], ['big'], ['after']]
+
+def test_max_open_flushes_oldest_group():
+    records = [('a', 'a0', 10), ('b', 'b0', 10), ('c', 'c0', 10), ('a', 'a1', 10)]
+    _, manifests, _ = run_batcher(records, max_open=2)
+    assert [(m['GroupKey'], m['FilePaths']) for m in manifests] == [
+        ('a', ['a0']), ('b', ['b0']), ('c', ['c0']), ('a', ['a1'])]
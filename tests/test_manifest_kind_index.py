@@ -0,0 +1,70 @@
+import json
+import pytest
+from manifest_kind_index import ManifestLibrary, compatible, parse_kind, scan_kind, walk_kind
+
+@pytest.mark.parametrize('text, expected', [
+    ('{"kind": "osdu:wks:X:1.0.0", "data": {}}', (True, 'osdu:wks:X:1.0.0')),
+    ('{"data": {"kind": "nested"}, "kind" : "top"}', (True, 'top')),
+    ('{"data": [{"kind": "nested"}]}', (True, None)),
+    ('{"note": "a \\"kind\\" in a string", "kind": "k"}', (True, 'k')),
+    ('{"data": {"kind": "nested"', (False, None)),
+    ('{"kind": "osdu:wks:X:1', (False, None)),
+    ('{"description": "cut short', (False, None)),
+    ('{"kind": 1}', (False, None)),
+    ('', (False, None)),
+])
+def test_walk_kind(text, expected):
+    assert walk_kind(text) == expected
+
+def test_scan_kind_reads_past_prefix(tmp_path):
+    path = tmp_path / 'manifest.json'
+    path.write_text(json.dumps({'description': 'x' * 100, 'kind': 'osdu:wks:X:1.0.0'}))
+    assert scan_kind(str(path), prefix_size=16) == 'osdu:wks:X:1.0.0'
+
+def test_parse_kind():
+    assert parse_kind('osdu:wks:master-data--Well:1.2.3') == ('osdu:wks:master-data--Well', (1, 2, 3))
+    assert parse_kind('osdu:wks:master-data--Well:1') == ('osdu:wks:master-data--Well', (1,))
+    assert parse_kind('unversioned') == ('unversioned', None)
+
+def test_compatible():
+    assert compatible((1, 2, 0), (1, 0, 0))
+    assert compatible((1, 0, 0), None)
+    assert not compatible((1, 0, 0), (1, 2, 0))
+    assert not compatible((2, 0, 0), (1, 0, 0))
+    assert not compatible(None, (1, 0, 0))
+
+@pytest.fixture
+def library(tmp_path):
+    manifests_dir = tmp_path / 'manifests'
+    manifests_dir.mkdir()
+    for name, kind in [('x100.json', 'osdu:wks:X:1.0.0'), ('x120.json', 'osdu:wks:X:1.2.0'),
+                       ('x200.json', 'osdu:wks:X:2.0.0'), ('y.json', 'osdu:wks:Y:1.0.0')]:
+        (manifests_dir / name).write_text(json.dumps({'kind': kind, 'name': name}))
+    return ManifestLibrary(str(manifests_dir), str(tmp_path / 'index.sqlite'), max_workers=1)
+
+def test_library_exact_kind(library):
+    assert library.resolve('osdu:wks:X:1.0.0') == 'osdu:wks:X:1.0.0'
+    assert library.manifest('osdu:wks:X:1.0.0')['name'] == 'x100.json'
+
+def test_library_serves_highest_compatible_version(library):
+    assert library.resolve('osdu:wks:X:1.1.0') == 'osdu:wks:X:1.2.0'
+    assert library.resolve('osdu:wks:X:1') == 'osdu:wks:X:1.2.0'
+    assert library.manifest('osdu:wks:X:1.1.0')['name'] == 'x120.json'
+    assert 'osdu:wks:X:1.1.0' in library
+
+def test_library_misses_incompatible_version(library):
+    assert library.resolve('osdu:wks:X:1.3.0') is None
+    assert library.resolve('osdu:wks:X:3.0.0') is None
+    assert library.resolve('osdu:wks:Z:1.0.0') is None
+    assert 'osdu:wks:X:3.0.0' not in library
+    assert library.manifest('osdu:wks:X:3.0.0') is None
+    assert library.files_for('osdu:wks:X:3.0.0') == []
+
+def test_library_kinds_are_declared_kinds(library):
+    assert sorted(library.kinds()) == ['osdu:wks:X:1.0.0', 'osdu:wks:X:1.2.0', 'osdu:wks:X:2.0.0', 'osdu:wks:Y:1.0.0']
+    assert 'osdu:wks:X:1.1.0' not in library.kinds()
+
+def test_library_picks_up_changed_files(tmp_path, library):
+    (tmp_path / 'manifests' / 'x130.json').write_text(json.dumps({'kind': 'osdu:wks:X:1.3.0'}))
+    refreshed = ManifestLibrary(library.manifests_dir, str(tmp_path / 'index.sqlite'), max_workers=1)
+    assert refreshed.resolve('osdu:wks:X:1.1.0') == 'osdu:wks:X:1.3.0'
@@ -0,0 +1,109 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+data_dir = 'data'
+
+# Charts are drawn from aggregated summaries in a separate worker process, so
+# the pipeline never waits on matplotlib and never ships raw rows to it.
+
+def render_inventory_charts(kinds_summary, output_dir=data_dir):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    kinds = kinds_summary.get('kinds', {})
+    counts = {category: kind['count'] for category, kind in kinds.items()}
+    if kinds_summary.get('unknown_count'):
+        counts['Unknown'] = kinds_summary['unknown_count']
+    if not counts:
+        print("Summary is empty. No visualizations will be generated.")
+        return []
+    written = []
+
+    # File type distribution
+    categories = sorted(counts, key=counts.get, reverse=True)
+    plt.figure(figsize=(12, 6))
+    plt.bar(categories, [counts[category] for category in categories])
+    plt.title('File Type Distribution')
+    plt.xlabel('Category')
+    plt.ylabel('Count')
+    plt.xticks(rotation=90)
+    plt.tight_layout()
+    path = os.path.join(output_dir, 'file_type_distribution.png')
+    plt.savefig(path)
+    plt.close()
+    written.append(path)
+
+    # File size statistics
+    categories = list(kinds)
+    plt.figure(figsize=(12, 6))
+    plt.bar(categories, [kinds[category]['size_stats']['avg'] / 1024 / 1024 for category in categories])  # Convert to MB
+    plt.title('Average File Size by Category')
+    plt.xlabel('Category')
+    plt.ylabel('Average Size (MB)')
+    plt.xticks(rotation=90)
+    plt.tight_layout()
+    path = os.path.join(output_dir, 'avg_file_size_by_category.png')
+    plt.savefig(path)
+    plt.close()
+    written.append(path)
+    return written
+
+def render_coverage_chart(percentages, output_file=os.path.join(data_dir, 'manifest_coverage_visualization.png')):
+    # percentages: {category: coverage percentage}
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 6))
+    plt.bar(list(percentages), list(percentages.values()))
+    plt.title('Manifest Coverage by Category')
+    plt.xlabel('Category')
+    plt.ylabel('Coverage Percentage')
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+    plt.savefig(output_file)
+    plt.close()
+    return [output_file]
+
+class BackgroundRenderer:
+    # One spawned worker process renders the submitted charts in order. With
+    # enabled=False every submit is skipped. Closing waits for the charts
+    # already submitted; a chart that fails is logged, never raised.
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._executor = None
+        self._futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, render, *args):
+        if not self.enabled:
+            return None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        future = self._executor.submit(render, *args)
+        self._futures.append(future)
+        return future
+
+    def close(self):
+        if self._executor is None:
+            return []
+        written = []
+        for future in self._futures:
+            try:
+                written.extend(future.result() or [])
+            except Exception as e:
+                logging.error(f"Visualization failed: {str(e)}")
+        self._executor.shutdown()
+        self._executor = None
+        self._futures = []
+        for path in written:
+            print(f"Visualization saved to {path}")
+        return written